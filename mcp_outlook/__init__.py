@@ -1,11 +1,16 @@
 """Utilities for the Outlook FastMCP server."""
 
-from .config import GraphSettings, get_graph_settings  # noqa: F401
+from .config import GraphSettings, ServerSettings, get_graph_settings, get_server_settings  # noqa: F401
 from .auth import GraphTokenManager, GraphAuthError  # noqa: F401
+from .state import StateStore, get_state_store  # noqa: F401
 
 __all__ = [
     "GraphSettings",
     "GraphTokenManager",
     "GraphAuthError",
+    "ServerSettings",
+    "StateStore",
     "get_graph_settings",
+    "get_server_settings",
+    "get_state_store",
 ]
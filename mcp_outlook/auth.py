@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import hashlib
 import time
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import httpx
 import logging
 
 from .config import GraphSettings
 
+if TYPE_CHECKING:
+    from .state import StateStore
+
 
 class GraphAuthError(RuntimeError):
     """Raised when acquiring a Microsoft Graph token fails."""
@@ -19,6 +23,10 @@ class GraphTokenManager:
 
     The manager prefers a delegated token when provided. Otherwise, it issues
     client-credential tokens and caches them until shortly before expiry.
+
+    When a shared ``StateStore`` is supplied, client-credential tokens are
+    cached there as well, and only one worker process refreshes a given
+    credential at a time while the others wait for its result.
     """
 
     def __init__(
@@ -32,6 +40,8 @@ class GraphTokenManager:
         http_timeout: float = 15.0,
         clock_skew_buffer: float = 60.0,
         client: Optional[httpx.Client] = None,
+        store: Optional["StateStore"] = None,
+        refresh_poll_interval: float = 0.05,
     ) -> None:
         # Priority: constructor parameters > settings > None
         # This enables multi-tenant usage where credentials come from tool parameters
@@ -43,6 +53,8 @@ class GraphTokenManager:
         self._http_timeout = http_timeout
         self._clock_skew_buffer = clock_skew_buffer
         self._client = client
+        self._store = store
+        self._refresh_poll_interval = refresh_poll_interval
         self._token: Optional[str] = None
         self._expiry: float = 0.0
         self._logger = logging.getLogger("mcp_outlook.auth")
@@ -58,19 +70,94 @@ class GraphTokenManager:
             GraphAuthError: when token acquisition fails.
         """
         if self._delegated_token:
-            self._logger.debug("Using delegated Microsoft Graph token.")
+            self._logger.debug(
+                "Using delegated Microsoft Graph token.", extra={"event": "auth.delegated"}
+            )
             return self._delegated_token
 
         if self._token and (time.time() + self._clock_skew_buffer) < self._expiry:
-            self._logger.debug("Reusing cached Microsoft Graph token.")
+            self._logger.debug(
+                "Reusing cached Microsoft Graph token.", extra={"event": "auth.cached"}
+            )
             return self._token
 
-        token, expiry = self._request_client_credentials_token()
+        if self._store is not None:
+            token, expiry = self._get_shared_token()
+        else:
+            token, expiry = self._request_client_credentials_token()
+            self._logger.info(
+                "Fetched new Microsoft Graph access token.", extra={"event": "auth.fetched"}
+            )
         self._token = token
         self._expiry = expiry
-        self._logger.info("Fetched new Microsoft Graph access token.")
         return token
 
+    def caller_identity(self) -> str:
+        """
+        Return a stable, non-secret identifier for the credentials in use.
+
+        Records that must not be shared between callers, such as idempotency
+        keys and rate-limit buckets, are scoped by this value. They are
+        checked before Graph has seen the token, so a delegated token is
+        identified by a hash of the whole token rather than by its claims,
+        which anyone can copy into a token with a forged signature. A
+        refreshed token therefore counts as a new caller.
+        """
+        if self._delegated_token:
+            digest = hashlib.sha256(self._delegated_token.encode("utf-8")).hexdigest()
+            return f"delegated:{digest[:32]}"
+        return f"app:{self._cache_key()[:32]}"
+
+    def _cache_key(self) -> str:
+        # The secret is part of the key so a caller cannot pick up a token
+        # cached for the same tenant/client with a different (wrong) secret.
+        material = "\0".join(
+            [self._tenant_id or "", self._client_id or "", self._client_secret or ""]
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _is_fresh(self, expiry: float) -> bool:
+        return (time.time() + self._clock_skew_buffer) < expiry
+
+    def _get_shared_token(self) -> tuple[str, float]:
+        assert self._store is not None
+        key = self._cache_key()
+        cached = self._store.get_token(key)
+        if cached and self._is_fresh(cached[1]):
+            self._logger.debug(
+                "Reusing shared Microsoft Graph token.", extra={"event": "auth.cached"}
+            )
+            return cached
+
+        lease = f"token-refresh:{key}"
+        if self._store.try_acquire_lease(lease, ttl=self._http_timeout):
+            try:
+                # Another worker may have finished a refresh since our read.
+                cached = self._store.get_token(key)
+                if cached and self._is_fresh(cached[1]):
+                    return cached
+                token, expiry = self._request_client_credentials_token()
+                self._store.put_token(key, token, expiry)
+                self._logger.info(
+                    "Fetched new Microsoft Graph access token.", extra={"event": "auth.fetched"}
+                )
+                return token, expiry
+            finally:
+                self._store.release_lease(lease)
+
+        deadline = time.monotonic() + self._http_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self._refresh_poll_interval)
+            cached = self._store.get_token(key)
+            if cached and self._is_fresh(cached[1]):
+                self._logger.debug("Received Microsoft Graph token refreshed by another worker.")
+                return cached
+
+        self._logger.warning("Timed out waiting for shared token refresh; fetching directly.")
+        token, expiry = self._request_client_credentials_token()
+        self._store.put_token(key, token, expiry)
+        return token, expiry
+
     def _request_client_credentials_token(self) -> tuple[str, float]:
         if not (self._tenant_id and self._client_id and self._client_secret):
             raise GraphAuthError(
@@ -121,3 +208,4 @@ class GraphTokenManager:
 
         expiry = time.time() + float(expires_in)
         return token, expiry
+
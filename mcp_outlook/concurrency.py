@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Optional, Sequence
+
+from .config import get_server_settings
+
+
+THROTTLE_STATUS = frozenset({429, 503})
+
+
+class ConcurrencyLimitError(RuntimeError):
+    """Raised when no send slot frees up within the configured wait."""
+
+
+class AIMDLimiter:
+    """
+    Additive-increase/multiplicative-decrease limit on in-flight requests.
+
+    Each healthy completion raises the limit by ``increase / limit``, so the
+    limit grows by about ``increase`` per window of ``limit`` requests. A
+    completion counts as healthy while its latency stays within
+    ``latency_tolerance`` times the fastest latency seen recently. A throttled
+    completion multiplies the limit by ``decrease``. Only requests that
+    started after the previous decrease can trigger another one, so a burst
+    of 429s from one window backs off once rather than collapsing the limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        initial: float = 4.0,
+        minimum: float = 1.0,
+        maximum: float = 64.0,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._minimum = minimum
+        self._maximum = maximum
+        self._increase = increase
+        self._decrease = decrease
+        self._latency_tolerance = latency_tolerance
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._limit = max(minimum, min(maximum, initial))
+        self._in_flight = 0
+        self._idle_since = clock()
+        self._min_latency: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._completed = 0
+        self._throttled = 0
+        self._last_decision = "initial"
+        self._decisions = {"increase": 0, "decrease": 0, "hold": 0}
+        self._logger = logging.getLogger("mcp_outlook.concurrency")
+
+    @property
+    def limit(self) -> float:
+        return self._limit
+
+    def idle_since(self) -> Optional[float]:
+        """When the last slot was freed, or None while a send holds one."""
+        with self._cond:
+            return self._idle_since if self._in_flight == 0 else None
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Wait for a free slot.
+
+        Returns:
+            The start time to pass to ``release``, or None on timeout.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                remaining = None if deadline is None else deadline - self._clock()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            self._in_flight += 1
+            return self._clock()
+
+    def release(self, started: float, *, throttled: bool, latency: Optional[float] = None) -> None:
+        with self._cond:
+            self._free_slot()
+            self._completed += 1
+            if throttled:
+                self._throttled += 1
+                if started >= self._last_decrease:
+                    self._limit = max(self._minimum, self._limit * self._decrease)
+                    self._last_decrease = self._clock()
+                    self._decide("decrease")
+                    self._logger.info(
+                        "Throttled on %s; concurrency limit now %.2f", self.name, self._limit
+                    )
+                else:
+                    self._decide("hold")
+            elif latency is not None and not self._latency_healthy(latency):
+                self._decide("hold")
+            else:
+                self._limit = min(self._maximum, self._limit + self._increase / self._limit)
+                self._decide("increase")
+            self._cond.notify_all()
+
+    def abandon(self) -> None:
+        """Free a slot without feeding the outcome back into the limit."""
+        with self._cond:
+            self._free_slot()
+            self._cond.notify_all()
+
+    def _decide(self, decision: str) -> None:
+        self._last_decision = decision
+        self._decisions[decision] += 1
+
+    def _free_slot(self) -> None:
+        self._in_flight -= 1
+        if self._in_flight == 0:
+            self._idle_since = self._clock()
+
+    def _latency_healthy(self, latency: float) -> bool:
+        if self._min_latency is None or latency < self._min_latency:
+            self._min_latency = latency
+        else:
+            # Let the baseline drift up slowly so a permanent shift in
+            # Graph latency does not hold the limit forever.
+            self._min_latency += (latency - self._min_latency) * 0.01
+        return latency <= self._min_latency * self._latency_tolerance
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "limit": round(self._limit, 3),
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "throttled": self._throttled,
+                "min_latency": self._min_latency,
+                "last_decision": self._last_decision,
+                "decisions": dict(self._decisions),
+            }
+
+
+class SendPermit:
+    """Slots held in one or more limiters for a single send."""
+
+    def __init__(self, held: Sequence[tuple[AIMDLimiter, float]], clock: Callable[[], float]) -> None:
+        self._held = held
+        self._clock = clock
+        self._released = False
+
+    def release(
+        self,
+        *,
+        throttled: bool = False,
+        record_latency: bool = True,
+        completed: bool = True,
+    ) -> None:
+        """
+        Free the held slots.
+
+        Args:
+            completed: False when the send's outcome says nothing about
+                capacity: it was cancelled, failed to connect, or was
+                rejected with an error other than throttling.
+        """
+        if self._released:
+            return
+        self._released = True
+        for limiter, started in reversed(self._held):
+            if not completed:
+                limiter.abandon()
+                continue
+            latency = self._clock() - started if record_latency else None
+            limiter.release(started, throttled=throttled, latency=latency)
+
+
+class ConcurrencyController:
+    """
+    Per-tenant and per-mailbox adaptive limits on in-flight Graph sends.
+
+    Limits are kept per process; each HTTP worker adapts on its own. A
+    limiter with nothing in flight for ``idle_timeout`` seconds is dropped,
+    so a long-running server does not keep one for every mailbox it has
+    ever sent from; the key starts again from the initial limit.
+    """
+
+    def __init__(
+        self,
+        *,
+        wait_timeout: float = 30.0,
+        idle_timeout: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+        **limiter_options,
+    ) -> None:
+        self._wait_timeout = wait_timeout
+        self._idle_timeout = idle_timeout
+        self._clock = clock
+        self._limiter_options = limiter_options
+        self._limiters: dict[str, AIMDLimiter] = {}
+        self._last_sweep = clock()
+        self._lock = threading.Lock()
+
+    def limiter(self, key: str) -> AIMDLimiter:
+        with self._lock:
+            now = self._clock()
+            # Sweep at most a few times per idle_timeout to keep lookups cheap.
+            if now - self._last_sweep >= self._idle_timeout / 4:
+                self._last_sweep = now
+                self._evict_idle(now)
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = AIMDLimiter(key, clock=self._clock, **self._limiter_options)
+                self._limiters[key] = limiter
+            return limiter
+
+    def _evict_idle(self, now: float) -> None:
+        for key, limiter in list(self._limiters.items()):
+            idle_since = limiter.idle_since()
+            if idle_since is not None and now - idle_since >= self._idle_timeout:
+                del self._limiters[key]
+
+    def acquire(self, tenant: str, mailbox: str, timeout: Optional[float] = None) -> SendPermit:
+        """
+        Take a slot from the tenant and then the mailbox limiter.
+
+        Args:
+            timeout: optional wait shorter than the configured ``wait_timeout``.
+
+        Raises:
+            ConcurrencyLimitError: if either slot is not available in time.
+        """
+        held: list[tuple[AIMDLimiter, float]] = []
+        wait = self._wait_timeout if timeout is None else min(timeout, self._wait_timeout)
+        deadline = self._clock() + wait
+        for key in (f"tenant:{tenant}", f"mailbox:{mailbox}"):
+            limiter = self.limiter(key)
+            started = limiter.acquire(timeout=max(0.0, deadline - self._clock()))
+            if started is None:
+                SendPermit(held, self._clock).release(completed=False)
+                raise ConcurrencyLimitError(
+                    f"No send slot available for {key} within {wait:.0f}s."
+                )
+            held.append((limiter, started))
+        return SendPermit(held, self._clock)
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {key: limiter.snapshot() for key, limiter in sorted(limiters.items())}
+
+    def render_prometheus(self) -> str:
+        """
+        Render current limits in the Prometheus text exposition format.
+
+        Tenant ids and mailbox addresses are replaced by a short hash in the
+        ``key`` label, so scrapes do not collect addresses.
+        """
+        lines = [
+            "# HELP mcp_outlook_send_concurrency_limit Adaptive in-flight send limit.",
+            "# TYPE mcp_outlook_send_concurrency_limit gauge",
+        ]
+        snapshot = {_metric_key(key): stats for key, stats in self.snapshot().items()}
+        for key, stats in snapshot.items():
+            lines.append(f'mcp_outlook_send_concurrency_limit{{key="{key}"}} {stats["limit"]}')
+        lines += [
+            "# HELP mcp_outlook_send_in_flight Sends currently in flight.",
+            "# TYPE mcp_outlook_send_in_flight gauge",
+        ]
+        for key, stats in snapshot.items():
+            lines.append(f'mcp_outlook_send_in_flight{{key="{key}"}} {stats["in_flight"]}')
+        lines += [
+            "# HELP mcp_outlook_send_throttled_total Sends throttled by Graph.",
+            "# TYPE mcp_outlook_send_throttled_total counter",
+        ]
+        for key, stats in snapshot.items():
+            lines.append(f'mcp_outlook_send_throttled_total{{key="{key}"}} {stats["throttled"]}')
+        lines += [
+            "# HELP mcp_outlook_send_limit_decisions_total Limit adjustments by decision.",
+            "# TYPE mcp_outlook_send_limit_decisions_total counter",
+        ]
+        for key, stats in snapshot.items():
+            for decision, count in stats["decisions"].items():
+                lines.append(
+                    f'mcp_outlook_send_limit_decisions_total{{key="{key}",decision="{decision}"}} '
+                    f"{count}"
+                )
+        lines += [
+            "# HELP mcp_outlook_send_last_decision Most recent limit decision (always 1).",
+            "# TYPE mcp_outlook_send_last_decision gauge",
+        ]
+        for key, stats in snapshot.items():
+            decision = stats["last_decision"]
+            lines.append(f'mcp_outlook_send_last_decision{{key="{key}",decision="{decision}"}} 1')
+        return "\n".join(lines) + "\n"
+
+
+def _metric_key(key: str) -> str:
+    kind, _, value = key.partition(":")
+    digest = hashlib.sha256(value.encode()).hexdigest()[:12]
+    return f"{kind}:{digest}"
+
+
+@lru_cache(maxsize=1)
+def get_concurrency_controller() -> ConcurrencyController:
+    """Return the process-wide controller configured from the environment."""
+    settings = get_server_settings()
+    return ConcurrencyController(
+        wait_timeout=settings.concurrency_wait,
+        initial=settings.concurrency_initial,
+        maximum=settings.concurrency_max,
+    )
@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from functools import lru_cache
 import os
+import tempfile
 from typing import Optional
 
 
@@ -37,6 +38,144 @@ class GraphSettings:
         )
 
 
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError as exc:
+        raise ConfigurationError(f"{name} must be an integer, got {raw!r}.") from exc
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError as exc:
+        raise ConfigurationError(f"{name} must be a number, got {raw!r}.") from exc
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_rates(name: str) -> tuple[tuple[str, float], ...]:
+    """Parse ``event=rate`` pairs such as ``"send.prepare=0.1,send.accepted=0.01"``."""
+    raw = os.environ.get(name, "").strip()
+    rates = []
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        event, _, rate = item.partition("=")
+        try:
+            value = float(rate)
+        except ValueError as exc:
+            raise ConfigurationError(
+                f"{name} entries must look like event=rate, got {item!r}."
+            ) from exc
+        if not event.strip() or not 0 <= value <= 1:
+            raise ConfigurationError(
+                f"{name} entries must look like event=rate with 0 <= rate <= 1, got {item!r}."
+            )
+        rates.append((event.strip(), value))
+    return tuple(rates)
+
+
+def _default_state_path() -> str:
+    state_home = os.environ.get("XDG_STATE_HOME", "").strip() or os.path.join(
+        os.path.expanduser("~"), ".local", "state"
+    )
+    return os.path.join(state_home, "mcp-outlook", "state.sqlite3")
+
+
+_LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+@dataclass(frozen=True)
+class ServerSettings:
+    transport: str = "stdio"
+    host: str = "127.0.0.1"
+    port: int = 8000
+    workers: int = 1
+    state_path: Optional[str] = None
+    mailbox_rate_per_minute: Optional[float] = None
+    idempotency_ttl: float = 86400.0
+    admin_tools: bool = False
+    profile_calls: Optional[int] = None
+    profile_seconds: Optional[float] = None
+    profile_mode: str = "cprofile"
+    profile_dir: str = os.path.join(tempfile.gettempdir(), "mcp-outlook-profiles")
+    http_record_path: Optional[str] = None
+    http_replay_path: Optional[str] = None
+    http_replay_speed: float = 1.0
+    draft_threshold_bytes: int = 3 * 1024 * 1024
+    attachment_concurrency: int = 4
+    schedule_batch_size: int = 20
+    schedule_batch_interval: float = 1.0
+    concurrency_initial: float = 4.0
+    concurrency_max: float = 64.0
+    concurrency_wait: float = 30.0
+    send_timeout: float = 35.0
+    log_level: str = "WARNING"
+    log_queue_size: int = 10000
+    log_sample_rates: tuple[tuple[str, float], ...] = ()
+    log_unredacted: bool = False
+
+    @classmethod
+    def load(cls) -> "ServerSettings":
+        transport = os.environ.get("MCP_OUTLOOK_TRANSPORT", "").strip() or "stdio"
+        host = os.environ.get("MCP_OUTLOOK_HOST", "").strip() or "127.0.0.1"
+        # ":memory:" keeps state in-process only; scheduled sends then refuse
+        # to run because they would not survive a restart.
+        state_path = os.environ.get("MCP_OUTLOOK_STATE_PATH", "").strip() or _default_state_path()
+        profile_mode = os.environ.get("MCP_OUTLOOK_PROFILE_MODE", "").strip() or "cprofile"
+        profile_dir = os.environ.get("MCP_OUTLOOK_PROFILE_DIR", "").strip() or cls.profile_dir
+        http_record_path = os.environ.get("MCP_OUTLOOK_HTTP_RECORD", "").strip() or None
+        http_replay_path = os.environ.get("MCP_OUTLOOK_HTTP_REPLAY", "").strip() or None
+        if http_record_path and http_replay_path:
+            raise ConfigurationError(
+                "MCP_OUTLOOK_HTTP_RECORD and MCP_OUTLOOK_HTTP_REPLAY cannot both be set."
+            )
+        log_level = os.environ.get("MCP_OUTLOOK_LOG_LEVEL", "").strip().upper() or "WARNING"
+        if log_level not in _LOG_LEVELS:
+            raise ConfigurationError(
+                f"MCP_OUTLOOK_LOG_LEVEL must be one of {', '.join(_LOG_LEVELS)}, got {log_level!r}."
+            )
+
+        # Worker processes only share tokens, rate limits, and idempotency
+        # records when they point at the same on-disk state store.
+        return cls(
+            transport=transport,
+            host=host,
+            port=_env_int("MCP_OUTLOOK_PORT", 8000),
+            workers=max(1, _env_int("MCP_OUTLOOK_WORKERS", 1)),
+            state_path=state_path,
+            mailbox_rate_per_minute=_env_float("MCP_OUTLOOK_MAILBOX_RATE_PER_MINUTE", None),
+            idempotency_ttl=_env_float("MCP_OUTLOOK_IDEMPOTENCY_TTL", 86400.0),
+            admin_tools=_env_flag("MCP_OUTLOOK_ADMIN_TOOLS"),
+            profile_calls=_env_int("MCP_OUTLOOK_PROFILE_CALLS", None),
+            profile_seconds=_env_float("MCP_OUTLOOK_PROFILE_SECONDS", None),
+            profile_mode=profile_mode,
+            profile_dir=profile_dir,
+            http_record_path=http_record_path,
+            http_replay_path=http_replay_path,
+            http_replay_speed=_env_float("MCP_OUTLOOK_HTTP_REPLAY_SPEED", 1.0),
+            draft_threshold_bytes=_env_int("MCP_OUTLOOK_DRAFT_THRESHOLD_BYTES", 3 * 1024 * 1024),
+            attachment_concurrency=max(1, _env_int("MCP_OUTLOOK_ATTACHMENT_CONCURRENCY", 4)),
+            schedule_batch_size=max(1, _env_int("MCP_OUTLOOK_SCHEDULE_BATCH_SIZE", 20)),
+            schedule_batch_interval=_env_float("MCP_OUTLOOK_SCHEDULE_BATCH_INTERVAL", 1.0),
+            concurrency_initial=_env_float("MCP_OUTLOOK_CONCURRENCY_INITIAL", 4.0),
+            concurrency_max=_env_float("MCP_OUTLOOK_CONCURRENCY_MAX", 64.0),
+            concurrency_wait=_env_float("MCP_OUTLOOK_CONCURRENCY_WAIT", 30.0),
+            send_timeout=_env_float("MCP_OUTLOOK_SEND_TIMEOUT", 35.0),
+            log_level=log_level,
+            log_queue_size=max(1, _env_int("MCP_OUTLOOK_LOG_QUEUE_SIZE", 10000)),
+            log_sample_rates=_env_rates("MCP_OUTLOOK_LOG_SAMPLE"),
+            log_unredacted=_env_flag("MCP_OUTLOOK_LOG_UNREDACTED"),
+        )
+
+
 @lru_cache(maxsize=1)
 def get_graph_settings() -> GraphSettings:
     """
@@ -46,3 +185,14 @@ def get_graph_settings() -> GraphSettings:
         ConfigurationError: if required environment variables are missing.
     """
     return GraphSettings.load()
+
+
+@lru_cache(maxsize=1)
+def get_server_settings() -> ServerSettings:
+    """
+    Retrieve cached server runtime settings.
+
+    Raises:
+        ConfigurationError: if a numeric environment variable is malformed.
+    """
+    return ServerSettings.load()
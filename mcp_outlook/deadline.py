@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+from .http_client import abort_thread_io, reset_thread_io
+
+
+# How long after the budget runs out the watchdog aborts bound I/O. Timeouts
+# from ``timeout()`` already end most requests by then and report as
+# timeouts; the watchdog catches responses that keep trickling in.
+EXPIRY_GRACE = 0.5
+
+
+class SendAbortedError(RuntimeError):
+    """Base class for sends stopped before Microsoft Graph answered."""
+
+
+class SendCancelledError(SendAbortedError):
+    """Raised when the caller cancels a send that is in progress."""
+
+
+class DeadlineExceededError(SendAbortedError):
+    """Raised when a send runs out of its time budget."""
+
+
+class Deadline:
+    """
+    Time budget and cancellation flag for one send.
+
+    Stages ask for a timeout with ``timeout()``, which never exceeds what is
+    left of the budget. Threads doing the call's HTTP I/O register with
+    ``bind()``; ``cancel()`` then aborts their in-flight requests at once.
+    httpx applies a timeout to each read rather than to a whole request, so
+    while any thread is bound a shared watchdog thread also aborts its I/O
+    shortly after the budget runs out.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        self._budget = budget
+        self._expires = None if budget is None else clock() + budget
+        self._cancelled = threading.Event()
+        self._threads: set[int] = set()
+        self._watched = False
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self._expires is not None and self._clock() >= self._expires
+
+    def remaining(self) -> Optional[float]:
+        if self._expires is None:
+            return None
+        return max(0.0, self._expires - self._clock())
+
+    def extend(self, seconds: float) -> None:
+        """Add ``seconds`` to the budget, e.g. once a send turns out to be large."""
+        with self._lock:
+            if self._expires is not None and seconds > 0:
+                self._budget += seconds
+                self._expires += seconds
+
+    def check(self, stage: str) -> None:
+        """
+        Raises:
+            SendCancelledError: if the send was cancelled.
+            DeadlineExceededError: if the budget is used up.
+        """
+        if self.cancelled:
+            raise SendCancelledError(f"Send cancelled by caller during {stage}.")
+        if self.expired:
+            raise DeadlineExceededError(
+                f"Send deadline of {self._budget:g}s exceeded during {stage}."
+            )
+
+    def timeout(self, cap: float, stage: str, *, share: float = 1.0) -> float:
+        """
+        Return the timeout for ``stage``: at most ``cap`` seconds and at most
+        ``share`` of the remaining budget.
+        """
+        self.check(stage)
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        return min(cap, remaining * share)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._abort_bound()
+
+    def _abort_bound(self) -> None:
+        # Abort under the lock: a thread leaving bind() clears its abort flag
+        # only after it has been unregistered, so it cannot pick up a flag
+        # meant for this send once it is reused for other work.
+        with self._lock:
+            abort_thread_io(self._threads)
+
+    def _on_watchdog(self) -> Optional[float]:
+        """Abort bound I/O if the budget is spent; else return the time left."""
+        with self._lock:
+            remaining = self.remaining()
+            if self._threads and remaining is not None and remaining > 0:
+                return remaining
+            self._watched = False
+            if self._threads:
+                abort_thread_io(self._threads)
+            return None
+
+    @contextmanager
+    def bind(self) -> Iterator[None]:
+        """Make the current thread's HTTP I/O abortable by ``cancel()``."""
+        ident = threading.get_ident()
+        with self._lock:
+            reset_thread_io(ident)
+            self._threads.add(ident)
+            watch = self._expires is not None and not self._watched
+            if watch:
+                self._watched = True
+            if self.cancelled:
+                abort_thread_io([ident])
+        if watch:
+            _watchdog.watch(self, self.remaining())
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads.discard(ident)
+                reset_thread_io(ident)
+
+
+class _Watchdog:
+    """
+    One thread that enforces the budgets of all bound deadlines.
+
+    Deadlines wait in a heap ordered by when they run out, so a send costs a
+    heap push rather than a thread of its own. An entry whose deadline was
+    extended is pushed back; one whose threads have all left is dropped.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, Deadline]] = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, deadline: Deadline, remaining: float) -> None:
+        fires_at = time.monotonic() + remaining + EXPIRY_GRACE
+        with self._cond:
+            heapq.heappush(self._heap, (fires_at, next(self._order), deadline))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="mcp-outlook-deadline", daemon=True
+                )
+                self._thread.start()
+            elif self._heap[0][2] is deadline:
+                self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                deadline = heapq.heappop(self._heap)[2]
+            remaining = deadline._on_watchdog()
+            if remaining is not None:
+                self.watch(deadline, remaining)
+
+
+_watchdog = _Watchdog()
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+import httpx
+
+from .deadline import Deadline
+from .http_client import reset_thread_io
+
+
+# Graph rejects JSON request bodies above 4 MB; stay clear of it once base64
+# and the rest of the message are accounted for.
+DEFAULT_DRAFT_THRESHOLD = 3 * 1024 * 1024
+# Attachments at or above this size must go through an upload session.
+INLINE_ATTACHMENT_LIMIT = 3 * 1024 * 1024
+# Upload session chunks must be a multiple of 320 KiB.
+UPLOAD_CHUNK_SIZE = 10 * 320 * 1024
+
+# Slowest upload rate (bytes per second) a draft send is budgeted for. A send
+# taking the draft strategy gets this much extra time for its attachments on
+# top of the usual send timeout, which only covers one sendMail call.
+DRAFT_MIN_UPLOAD_RATE = 256 * 1024
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def choose_send_strategy(
+    attachment_bytes: int,
+    save_to_sent_items: bool = True,
+    threshold: int = DEFAULT_DRAFT_THRESHOLD,
+) -> str:
+    """
+    Pick ``"inline"`` (a single sendMail request) or ``"draft"``.
+
+    The draft strategy is used once attachments alone exceed ``threshold``
+    bytes, where one large serial request is both slow and fragile. Sending a
+    draft always keeps a copy in Sent Items, so messages that opt out of
+    ``saveToSentItems`` stay inline.
+    """
+    if not save_to_sent_items:
+        return "inline"
+    if attachment_bytes > threshold:
+        return "draft"
+    return "inline"
+
+
+def draft_time_allowance(attachment_bytes: int) -> float:
+    """Extra seconds a draft send needs to upload ``attachment_bytes``."""
+    return attachment_bytes / DRAFT_MIN_UPLOAD_RATE
+
+
+class DraftSender:
+    """
+    Send a message by creating a draft, attaching files concurrently, and
+    then sending the draft.
+
+    Attachments under ``inline_limit`` are posted directly; larger ones are
+    streamed through an upload session. Each attachment request and each
+    upload chunk is retried on its own after throttling, server errors, or
+    transport failures, so one bad part does not restart the whole upload.
+    Creating and sending the draft are attempted once. The draft is deleted
+    if any step before the send ultimately fails. An optional
+    ``Deadline`` bounds every request and lets the caller abort the upload.
+    """
+
+    def __init__(
+        self,
+        client: httpx.Client,
+        token: str,
+        mailbox_url: str,
+        *,
+        max_concurrency: int = 4,
+        max_attempts: int = 3,
+        backoff: float = 0.5,
+        inline_limit: int = INLINE_ATTACHMENT_LIMIT,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+        timeout: float = 20.0,
+        deadline: Optional[Deadline] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._client = client
+        self._headers = {"Authorization": f"Bearer {token}"}
+        self._mailbox_url = mailbox_url
+        self._max_concurrency = max(1, max_concurrency)
+        self._max_attempts = max(1, max_attempts)
+        self._backoff = backoff
+        self._inline_limit = inline_limit
+        self._chunk_size = chunk_size
+        self._timeout = timeout
+        self._deadline = deadline
+        self._sleep = sleep
+        self._logger = logging.getLogger("mcp_outlook.drafts")
+
+    def send(self, graph_payload: dict) -> str:
+        """
+        Deliver ``graph_payload`` (as built by ``to_graph_payload``).
+
+        Returns:
+            str: the Graph id of the sent message.
+
+        Raises:
+            httpx.HTTPError: when a step fails after its retries.
+        """
+        message = dict(graph_payload["message"])
+        attachments = message.pop("attachments", [])
+
+        # Creating the draft and sending it are not idempotent: a retry after
+        # a timeout could leave a second draft behind or send the message
+        # twice, so both are attempted once.
+        response = self._request(
+            "POST",
+            f"{self._mailbox_url}/messages",
+            json=message,
+            headers=self._headers,
+            retry=False,
+        )
+        message_id = response.json()["id"]
+        message_url = f"{self._mailbox_url}/messages/{message_id}"
+        self._logger.info(
+            "Created draft %s; uploading %d attachment(s)", message_id, len(attachments)
+        )
+
+        send_issued = False
+        try:
+            if attachments:
+                pool = ThreadPoolExecutor(
+                    max_workers=min(self._max_concurrency, len(attachments)),
+                    thread_name_prefix="mcp-outlook-attach",
+                )
+                try:
+                    futures = [
+                        pool.submit(self._attach, message_url, attachment)
+                        for attachment in attachments
+                    ]
+                    for future in futures:
+                        future.result()
+                finally:
+                    pool.shutdown(wait=True, cancel_futures=True)
+            send_issued = True
+            self._request("POST", f"{message_url}/send", headers=self._headers, retry=False)
+        except BaseException:
+            # Once /send has gone out the message may have been delivered even
+            # if the response was lost; deleting the draft then would remove
+            # the only copy, so it is left in place.
+            if not send_issued:
+                self._discard(message_url)
+            raise
+
+        return message_id
+
+    def _attach(self, message_url: str, attachment: dict) -> None:
+        with self._deadline.bind() if self._deadline else nullcontext():
+            self._upload(message_url, attachment)
+
+    def _upload(self, message_url: str, attachment: dict) -> None:
+        content = base64.b64decode(attachment["contentBytes"])
+        if len(content) < self._inline_limit:
+            self._request(
+                "POST",
+                f"{message_url}/attachments",
+                json=attachment,
+                headers=self._headers,
+            )
+            return
+
+        item = {
+            "attachmentType": "file",
+            "name": attachment["name"],
+            "size": len(content),
+            "contentType": attachment.get("contentType", "application/octet-stream"),
+        }
+        # Inline images must keep their content id, or the body's cid:
+        # reference to them breaks.
+        for field in ("isInline", "contentId"):
+            if field in attachment:
+                item[field] = attachment[field]
+        session = self._request(
+            "POST",
+            f"{message_url}/attachments/createUploadSession",
+            json={"AttachmentItem": item},
+            headers=self._headers,
+        )
+        upload_url = session.json()["uploadUrl"]
+        total = len(content)
+        for start in range(0, total, self._chunk_size):
+            chunk = content[start:start + self._chunk_size]
+            end = start + len(chunk) - 1
+            # The upload URL is pre-authorized; Graph rejects requests to it
+            # that also carry the bearer token.
+            self._request(
+                "PUT",
+                upload_url,
+                content=chunk,
+                headers={
+                    "Content-Length": str(len(chunk)),
+                    "Content-Range": f"bytes {start}-{end}/{total}",
+                },
+            )
+        self._logger.debug("Uploaded %s in chunks (%d bytes)", attachment["name"], total)
+
+    def _request(
+        self, method: str, url: str, *, retry: bool = True, **kwargs
+    ) -> httpx.Response:
+        last_error: Optional[httpx.HTTPError] = None
+        stage = f"draft {method} request"
+        max_attempts = self._max_attempts if retry else 1
+        for attempt in range(1, max_attempts + 1):
+            timeout = self._deadline.timeout(self._timeout, stage) if self._deadline else self._timeout
+            try:
+                response = self._client.request(method, url, timeout=timeout, **kwargs)
+                response.raise_for_status()
+                return response
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code not in _RETRYABLE_STATUS:
+                    raise
+                last_error = exc
+                delay = _retry_after(exc.response) or self._backoff * (2 ** (attempt - 1))
+            except httpx.TransportError as exc:
+                if self._deadline:
+                    self._deadline.check(stage)
+                last_error = exc
+                delay = self._backoff * (2 ** (attempt - 1))
+
+            if attempt < max_attempts:
+                if self._deadline:
+                    remaining = self._deadline.remaining()
+                    if remaining is not None and delay >= remaining:
+                        break
+                # Upload session URLs carry a pre-authorized token in their
+                # query, and status errors repeat the URL, so neither is logged.
+                self._logger.warning(
+                    "%s %s failed (attempt %d/%d): %s; retrying in %.2fs",
+                    method,
+                    url.split("?", 1)[0],
+                    attempt,
+                    max_attempts,
+                    _describe_error(last_error),
+                    delay,
+                )
+                self._sleep(delay)
+
+        assert last_error is not None
+        raise last_error
+
+    def _discard(self, message_url: str) -> None:
+        # A cancelled send has aborted this thread's I/O; clean up anyway.
+        reset_thread_io(threading.get_ident())
+        try:
+            self._client.delete(message_url, headers=self._headers, timeout=self._timeout)
+        except httpx.HTTPError as exc:
+            self._logger.warning("Could not delete failed draft %s: %s", message_url, exc)
+
+
+def _describe_error(error: httpx.HTTPError) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    return f"{type(error).__name__}: {error}"
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator, Sequence
 from enum import Enum
-from typing import List, Optional
+from functools import lru_cache
+import json
+import re
+import sys
+from typing import Any, List, Optional, Union, overload
 
-from pydantic import BaseModel, EmailStr, Field, ValidationError, field_validator, model_validator
+from pydantic import BaseModel, EmailStr, Field, ValidationError, model_validator
+from pydantic.networks import validate_email
+from pydantic_core import PydanticCustomError, core_schema
+
+try:
+    from email_validator import SPECIAL_USE_DOMAIN_NAMES
+except ImportError:  # EmailStr reports the missing dependency on first use.
+    SPECIAL_USE_DOMAIN_NAMES = None
 
 
 class EmailBodyType(str, Enum):
@@ -24,6 +36,148 @@ class Recipient(BaseModel):
         return {"emailAddress": {"address": self.address}}
 
 
+_ATEXT = r"A-Za-z0-9_!#$%&'*+\-/=?^`{|}~"
+_LABEL = r"[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?"
+# Plain ASCII addresses, the bulk of any distribution list. Everything this
+# matches (subject to the checks in _plain_address) email-validator accepts
+# and normalises by lowercasing the domain; anything else goes through it.
+_PLAIN_ADDRESS = re.compile(rf"([{_ATEXT}]{{1,64}}(?:\.[{_ATEXT}]+)*)@({_LABEL}(?:\.{_LABEL})+)")
+_SPECIAL_USE_DOMAIN = (
+    re.compile(r"(?:^|\.)(?:" + "|".join(map(re.escape, SPECIAL_USE_DOMAIN_NAMES)) + r")\Z")
+    if SPECIAL_USE_DOMAIN_NAMES is not None
+    else None
+)
+
+
+def _plain_address(value: str) -> Optional[str]:
+    """Normalise ``value`` without email-validator, or None if it needs the full check."""
+    if _SPECIAL_USE_DOMAIN is None:
+        return None
+    match = _PLAIN_ADDRESS.fullmatch(value)
+    if match is None or len(value) > 254 or len(match[1]) > 64:
+        return None
+    domain = match[2].lower()
+    # "--" may mark a Punycode label, which email-validator decodes; all
+    # TLDs end in a letter.
+    if "--" in domain or not domain[-1].isalpha() or _SPECIAL_USE_DOMAIN.search(domain):
+        return None
+    return sys.intern(f"{match[1]}@{domain}")
+
+
+@lru_cache(maxsize=65536)
+def _normalize_address(value: str) -> str:
+    # Same normalisation as EmailStr; cached because distribution lists
+    # repeat the same addresses from one send to the next.
+    return sys.intern(validate_email(value)[1])
+
+
+@lru_cache(maxsize=65536)
+def _graph_fragment(address: str) -> str:
+    return '{"emailAddress":{"address":' + json.dumps(address) + "}}"
+
+
+class RecipientList(Sequence):
+    """
+    Compact, deduplicated list of recipient addresses.
+
+    Large distribution sends carry thousands of recipients, and a model per
+    address plus a dict per address in the Graph payload dominates both time
+    and memory. This keeps only the interned address strings and a casefold
+    index, validates and dedupes in a single pass, and serialises straight to
+    Graph JSON. Plain ASCII addresses are checked with one regular expression;
+    only the rest go through email-validator. Indexing still returns
+    ``Recipient`` models, built on demand.
+    """
+
+    __slots__ = ("_addresses", "_index")
+
+    def __init__(self, addresses: Iterable[Union[str, Recipient, dict]] = ()) -> None:
+        self._addresses: list[str] = []
+        self._index: dict[str, int] = {}
+        for position, value in enumerate(addresses):
+            if isinstance(value, Recipient):
+                value = value.address
+            elif isinstance(value, dict):
+                value = value.get("address")
+            if not isinstance(value, str):
+                raise ValueError(
+                    f"Recipient {position} must be an email address, got {value!r}."
+                )
+            try:
+                address = _plain_address(value) or _normalize_address(value)
+            except PydanticCustomError as exc:
+                # One bad entry in a list of thousands must be easy to find.
+                raise ValueError(f"Recipient {position} ({value!r}): {exc}") from None
+            key = address.casefold()
+            if key not in self._index:
+                self._index[key] = len(self._addresses)
+                self._addresses.append(address)
+
+    @classmethod
+    def _coerce(cls, value: Any) -> "RecipientList":
+        if isinstance(value, cls):
+            return value
+        if value is None:
+            return cls()
+        if isinstance(value, (str, Recipient, dict)):
+            return cls([value])
+        return cls(value)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls._coerce,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda value: value.addresses
+            ),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: Any, handler: Any) -> dict:
+        return {"type": "array", "items": {"type": "string", "format": "email"}}
+
+    @property
+    def addresses(self) -> list[str]:
+        return list(self._addresses)
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    @overload
+    def __getitem__(self, index: int) -> Recipient: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Recipient]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Recipient.model_construct(address=a) for a in self._addresses[index]]
+        return Recipient.model_construct(address=self._addresses[index])
+
+    def __iter__(self) -> Iterator[Recipient]:
+        for address in self._addresses:
+            yield Recipient.model_construct(address=address)
+
+    def __contains__(self, value: object) -> bool:
+        if isinstance(value, Recipient):
+            value = value.address
+        return isinstance(value, str) and value.casefold() in self._index
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, RecipientList):
+            return self._addresses == other._addresses
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"RecipientList({self._addresses!r})"
+
+    def to_graph(self) -> list[dict]:
+        return [{"emailAddress": {"address": address}} for address in self._addresses]
+
+    def to_graph_json(self) -> str:
+        return "[" + ",".join(map(_graph_fragment, self._addresses)) + "]"
+
+
 class MessageBody(BaseModel):
     content: str
     content_type: EmailBodyType = EmailBodyType.TEXT
@@ -36,51 +190,39 @@ class FileAttachment(BaseModel):
     name: str
     content_bytes: str
     content_type: str = "application/octet-stream"
+    content_id: Optional[str] = None
+    is_inline: bool = False
 
     def to_graph(self) -> dict:
-        return {
+        graph = {
             "@odata.type": "#microsoft.graph.fileAttachment",
             "name": self.name,
             "contentType": self.content_type,
             "contentBytes": self.content_bytes,
         }
+        if self.content_id:
+            graph["contentId"] = self.content_id
+        if self.is_inline:
+            graph["isInline"] = True
+        return graph
 
 
 class SendMailRequest(BaseModel):
     subject: str = Field(..., min_length=1)
     body: MessageBody
-    to: List[Recipient] = Field(..., min_length=1)
-    cc: List[Recipient] = Field(default_factory=list)
-    bcc: List[Recipient] = Field(default_factory=list)
+    to: RecipientList
+    cc: RecipientList = Field(default_factory=RecipientList)
+    bcc: RecipientList = Field(default_factory=RecipientList)
     attachments: List[FileAttachment] = Field(default_factory=list)
     save_to_sent_items: bool = True
     sender_override: Optional[EmailStr] = None
     dry_run: bool = False
 
-    @field_validator("cc", "bcc", mode="before")
-    @classmethod
-    def _coerce_recipient_iterables(cls, value):
-        if value is None:
-            return []
-        if isinstance(value, (str, EmailStr)):
-            return [value]
-        return list(value)
-
     @model_validator(mode="after")
-    def _ensure_unique_recipients(self):
-        def dedupe(items: List[Recipient]) -> List[Recipient]:
-            seen = set()
-            unique: List[Recipient] = []
-            for item in items:
-                addr = item.address.casefold()
-                if addr not in seen:
-                    seen.add(addr)
-                    unique.append(item)
-            return unique
-
-        self.to = dedupe(self.to)
-        self.cc = dedupe(self.cc)
-        self.bcc = dedupe(self.bcc)
+    def _require_to_recipients(self):
+        # RecipientList dedupes case-insensitively as it validates.
+        if not self.to:
+            raise ValueError("at least one 'to' recipient is required")
         return self
 
     def resolve_sender(self, default_sender: Optional[str]) -> Optional[str]:
@@ -91,12 +233,12 @@ class SendMailRequest(BaseModel):
         message = {
             "subject": self.subject,
             "body": self.body.to_graph(),
-            "toRecipients": [recipient.to_graph() for recipient in self.to],
+            "toRecipients": self.to.to_graph(),
         }
         if self.cc:
-            message["ccRecipients"] = [recipient.to_graph() for recipient in self.cc]
+            message["ccRecipients"] = self.cc.to_graph()
         if self.bcc:
-            message["bccRecipients"] = [recipient.to_graph() for recipient in self.bcc]
+            message["bccRecipients"] = self.bcc.to_graph()
         if self.attachments:
             message["attachments"] = [attachment.to_graph() for attachment in self.attachments]
 
@@ -109,6 +251,34 @@ class SendMailRequest(BaseModel):
             "saveToSentItems": self.save_to_sent_items,
         }
 
+    def to_graph_json(self, default_sender: Optional[str]) -> bytes:
+        """
+        Serialise the same payload as ``to_graph_payload`` directly to JSON.
+
+        Recipient lists are spliced in as pre-rendered fragments, so no
+        per-recipient dicts are built on the send path.
+        """
+        head = {"subject": self.subject, "body": self.body.to_graph()}
+        fields = [json.dumps(head)[1:-1], '"toRecipients":' + self.to.to_graph_json()]
+        if self.cc:
+            fields.append('"ccRecipients":' + self.cc.to_graph_json())
+        if self.bcc:
+            fields.append('"bccRecipients":' + self.bcc.to_graph_json())
+        if self.attachments:
+            attachments = [attachment.to_graph() for attachment in self.attachments]
+            fields.append('"attachments":' + json.dumps(attachments))
+
+        sender = self.resolve_sender(default_sender)
+        if sender:
+            fields.append('"from":' + json.dumps({"emailAddress": {"address": sender}}))
+
+        save = "true" if self.save_to_sent_items else "false"
+        return ('{"message":{' + ",".join(fields) + '},"saveToSentItems":' + save + "}").encode()
+
+    def attachment_payload_size(self) -> int:
+        """Total base64 attachment bytes this message will carry."""
+        return sum(len(attachment.content_bytes) for attachment in self.attachments)
+
 
 def parse_send_mail_request(data: dict) -> SendMailRequest:
     try:
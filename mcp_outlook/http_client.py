@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import logging
+import socket
+import threading
+from typing import Iterable, Optional
+
+import httpcore
+import httpx
+
+from .config import get_server_settings
+from .replay import RecordingTransport, ReplayTransport
+
+
+# Streams currently doing I/O, keyed by thread, and threads whose I/O has been
+# aborted. Both are only touched under _io_lock.
+_io_lock = threading.Lock()
+_active_streams: dict[int, "_AbortableStream"] = {}
+_aborted_threads: set[int] = set()
+
+
+class _AbortableStream(httpcore.NetworkStream):
+    """Network stream whose blocking reads and writes another thread can abort."""
+
+    def __init__(self, stream: httpcore.NetworkStream) -> None:
+        self._stream = stream
+
+    def _enter(self) -> int:
+        ident = threading.get_ident()
+        with _io_lock:
+            if ident in _aborted_threads:
+                raise httpcore.ReadError("Request aborted by caller.")
+            _active_streams[ident] = self
+        return ident
+
+    def _exit(self, ident: int) -> None:
+        with _io_lock:
+            if _active_streams.get(ident) is self:
+                del _active_streams[ident]
+
+    def read(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+        ident = self._enter()
+        try:
+            return self._stream.read(max_bytes, timeout)
+        finally:
+            self._exit(ident)
+
+    def write(self, buffer: bytes, timeout: Optional[float] = None) -> None:
+        ident = self._enter()
+        try:
+            self._stream.write(buffer, timeout)
+        finally:
+            self._exit(ident)
+
+    def close(self) -> None:
+        self._stream.close()
+
+    def start_tls(self, ssl_context, server_hostname=None, timeout=None) -> httpcore.NetworkStream:
+        return _AbortableStream(self._stream.start_tls(ssl_context, server_hostname, timeout))
+
+    def get_extra_info(self, info: str):
+        return self._stream.get_extra_info(info)
+
+    def abort(self) -> None:
+        sock = self._stream.get_extra_info("socket")
+        if sock is None:
+            return
+        try:
+            # Shut down the raw socket rather than the SSL wrapper so the
+            # blocked reader wakes up without racing on SSL object state.
+            socket.socket.shutdown(sock, socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _AbortableBackend(httpcore.NetworkBackend):
+    def __init__(self, backend: httpcore.NetworkBackend) -> None:
+        self._backend = backend
+
+    def connect_tcp(self, *args, **kwargs) -> httpcore.NetworkStream:
+        return _AbortableStream(self._backend.connect_tcp(*args, **kwargs))
+
+    def connect_unix_socket(self, *args, **kwargs) -> httpcore.NetworkStream:
+        return _AbortableStream(self._backend.connect_unix_socket(*args, **kwargs))
+
+    def sleep(self, seconds: float) -> None:
+        self._backend.sleep(seconds)
+
+
+class AbortableHTTPTransport(httpx.HTTPTransport):
+    """
+    ``httpx.HTTPTransport`` whose in-flight requests can be aborted per thread.
+
+    Aborting shuts down the socket of the affected connection, so the pool
+    discards it immediately instead of holding it until a timeout fires.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        # httpx does not take a network backend argument; the pool is pinned
+        # by the httpx<0.29 requirement.
+        self._pool._network_backend = _AbortableBackend(self._pool._network_backend)
+
+
+def abort_thread_io(threads: Iterable[int]) -> None:
+    """Abort current and future HTTP I/O performed by ``threads``."""
+    with _io_lock:
+        streams = []
+        for ident in threads:
+            _aborted_threads.add(ident)
+            stream = _active_streams.get(ident)
+            if stream is not None:
+                streams.append(stream)
+    for stream in streams:
+        stream.abort()
+
+
+def reset_thread_io(ident: int) -> None:
+    """Allow ``ident`` to perform HTTP I/O again after an abort."""
+    with _io_lock:
+        _aborted_threads.discard(ident)
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """
+    Return the process-wide HTTP client used for identity and Graph calls.
+
+    Setting ``MCP_OUTLOOK_HTTP_RECORD`` records every exchange to a cassette;
+    ``MCP_OUTLOOK_HTTP_REPLAY`` serves responses from one instead of the network.
+    """
+    settings = get_server_settings()
+    logger = logging.getLogger("mcp_outlook.http")
+    transport: httpx.BaseTransport
+
+    if settings.http_replay_path:
+        logger.warning("Replaying HTTP exchanges from %s", settings.http_replay_path)
+        transport = ReplayTransport(
+            settings.http_replay_path,
+            speed=settings.http_replay_speed,
+            loop=True,
+        )
+    elif settings.http_record_path:
+        logger.warning("Recording HTTP exchanges to %s", settings.http_record_path)
+        transport = RecordingTransport(settings.http_record_path, AbortableHTTPTransport())
+    else:
+        transport = AbortableHTTPTransport()
+
+    return httpx.Client(transport=transport)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+import hashlib
+import re
+import threading
+from typing import Optional
+
+from .email import EmailBodyType, FileAttachment, SendMailRequest
+
+
+# A data: image URI inside a quoted attribute or a CSS url(...). The payload
+# runs to the closing delimiter so line-wrapped base64 is captured whole.
+_DATA_URI = re.compile(
+    r"""(?P<open>["'(])\s*data:(?P<type>image/[A-Za-z0-9.+-]+);base64,(?P<data>[^"')]+)"""
+)
+_WHITESPACE = re.compile(r"\s+")
+_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/svg+xml": "svg",
+}
+
+
+@dataclass(frozen=True)
+class InlineImage:
+    content_id: str
+    name: str
+    content_type: str
+    content_bytes: str
+
+    def to_attachment(self) -> FileAttachment:
+        return FileAttachment(
+            name=self.name,
+            content_bytes=self.content_bytes,
+            content_type=self.content_type,
+            content_id=self.content_id,
+            is_inline=True,
+        )
+
+
+@dataclass(frozen=True)
+class InlineImageReport:
+    references: int
+    unique_images: int
+    bytes_saved: int
+
+
+class InlineImageCache:
+    """
+    LRU cache of decoded-and-validated inline images keyed by a hash of the
+    raw data URI payload, shared across sends so a repeated logo is only
+    validated once and always gets the same ``contentId``.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, InlineImage] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[InlineImage]:
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key: str, image: InlineImage) -> None:
+        size = len(image.content_bytes)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = image
+            self._bytes += size
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.content_bytes)
+
+
+def _load_image(content_type: str, data: str) -> Optional[InlineImage]:
+    normalized = _WHITESPACE.sub("", data)
+    try:
+        raw = base64.b64decode(normalized, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    digest = hashlib.sha256(raw).hexdigest()
+    subtype = content_type.split("/", 1)[1]
+    extension = _EXTENSIONS.get(content_type, subtype.split("+", 1)[0])
+    return InlineImage(
+        content_id=f"img-{digest[:16]}@mcp-outlook",
+        name=f"image-{digest[:8]}.{extension}",
+        content_type=content_type,
+        content_bytes=normalized,
+    )
+
+
+def extract_inline_images(
+    request: SendMailRequest,
+    cache: Optional[InlineImageCache] = None,
+) -> InlineImageReport:
+    """
+    Move ``data:`` images out of an HTML body into inline attachments.
+
+    Each distinct image becomes one ``FileAttachment`` with a ``contentId``
+    and every reference to it is rewritten to ``cid:``. Payloads that are not
+    valid base64 are left untouched. The request is updated in place.
+
+    Returns:
+        InlineImageReport: reference and image counts, and the bytes removed
+        from the serialized message (body shrinkage minus the size of the
+        added attachment data).
+    """
+    if request.body.content_type is not EmailBodyType.HTML or "data:image/" not in request.body.content:
+        return InlineImageReport(references=0, unique_images=0, bytes_saved=0)
+
+    images: dict[str, InlineImage] = {}
+    references = 0
+
+    def replace(match: re.Match) -> str:
+        nonlocal references
+        data = match.group("data")
+        key = hashlib.blake2b(data.encode("ascii", "ignore"), digest_size=16).hexdigest()
+        image = cache.get(key) if cache is not None else None
+        if image is None:
+            image = _load_image(match.group("type").lower(), data)
+            if image is None:
+                return match.group(0)
+            if cache is not None:
+                cache.put(key, image)
+        images.setdefault(image.content_id, image)
+        references += 1
+        return f"{match.group('open')}cid:{image.content_id}"
+
+    original = request.body.content
+    rewritten = _DATA_URI.sub(replace, original)
+    if not images:
+        return InlineImageReport(references=0, unique_images=0, bytes_saved=0)
+
+    existing = {attachment.content_id for attachment in request.attachments if attachment.content_id}
+    added = [image for content_id, image in images.items() if content_id not in existing]
+    request.body.content = rewritten
+    request.attachments.extend(image.to_attachment() for image in added)
+
+    saved = (
+        len(original.encode("utf-8"))
+        - len(rewritten.encode("utf-8"))
+        - sum(len(image.content_bytes) for image in added)
+    )
+    return InlineImageReport(references=references, unique_images=len(images), bytes_saved=saved)
+
+
+@lru_cache(maxsize=1)
+def get_inline_image_cache() -> InlineImageCache:
+    """Return the process-wide inline image cache."""
+    return InlineImageCache()
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import atexit
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+import hashlib
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from typing import IO, Mapping, Optional
+from urllib.parse import unquote
+
+from .config import get_server_settings
+
+
+# Attributes every LogRecord carries; anything else arrived through ``extra``.
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "event"}
+# Also matches URL-encoded addresses ("alice%40contoso.com") as they appear
+# in logged Graph mailbox URLs. "/" is left out of the local part so only the
+# address, not the URL path before it, is replaced.
+_EMAIL = re.compile(r"[\w.!#$%&'*+=?^`{|}~-]+(?:@|%40)[\w-]+(?:\.[\w-]+)+")
+
+# ``extra`` fields whose values are replaced by a token rather than logged.
+SENSITIVE_FIELDS = frozenset({"subject", "sender", "mailbox", "recipient", "recipients"})
+MAX_MESSAGE_LENGTH = 2000
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in every ``1 / rate`` records per event type.
+
+    The event type is the ``event`` field passed through ``extra``. Records
+    without a configured rate, and anything at WARNING or above, always pass.
+    """
+
+    def __init__(self, rates: Mapping[str, float]) -> None:
+        super().__init__()
+        self._every = {
+            event: 0 if rate <= 0 else max(1, round(1 / rate)) for event, rate in rates.items()
+        }
+        self._counters = {event: itertools.count() for event in self._every}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        event = getattr(record, "event", None)
+        every = self._every.get(event)
+        if every is None:
+            return True
+        if every == 0:
+            return False
+        return next(self._counters[event]) % every == 0
+
+
+class DroppingBufferHandler(logging.Handler):
+    """
+    Append records to a bounded buffer, dropping them when it is full.
+
+    ``deque.append`` is atomic, so the caller takes no lock and wakes no
+    thread; records are rendered later by the pipeline's writer thread. Log
+    arguments must therefore not be mutated after the call.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        super().__init__()
+        self.buffer: deque[logging.LogRecord] = deque()
+        self.capacity = max(1, capacity)
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # Skip the handler lock that logging.Handler.handle takes around emit().
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if len(self.buffer) < self.capacity:
+            self.buffer.append(record)
+        else:
+            with self._drop_lock:
+                self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Render a record as one JSON line.
+
+    With ``redact`` set, ``SENSITIVE_FIELDS`` are replaced by a short salted
+    hash, so related lines can still be matched within one process, and
+    email addresses in any other text are replaced the same way. Messages
+    longer than ``max_message`` characters, such as full Graph error bodies,
+    are truncated.
+    """
+
+    def __init__(
+        self,
+        *,
+        redact: bool = True,
+        max_message: int = MAX_MESSAGE_LENGTH,
+        salt: Optional[bytes] = None,
+    ) -> None:
+        super().__init__()
+        self._redact = redact
+        self._max_message = max_message
+        self._salt = os.urandom(8) if salt is None else salt
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if len(message) > self._max_message:
+            message = message[: self._max_message] + "...[truncated]"
+
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        event = getattr(record, "event", None)
+        if event:
+            entry["event"] = event
+        entry["message"] = message
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        if self._redact:
+            for key, value in entry.items():
+                if key in SENSITIVE_FIELDS:
+                    entry[key] = self._token(str(value))
+                elif isinstance(value, str) and ("@" in value or "%40" in value):
+                    entry[key] = _EMAIL.sub(
+                        lambda match: self._token(unquote(match.group())), value
+                    )
+        return json.dumps(entry, default=str)
+
+    def _token(self, value: str) -> str:
+        digest = hashlib.blake2b(value.casefold().encode(), digest_size=4, key=self._salt)
+        return f"<redacted:{digest.hexdigest()}>"
+
+
+class LogPipeline:
+    """
+    Buffered JSON logging that keeps output off the calling thread.
+
+    Records from the installed logger are sampled and appended to a bounded
+    buffer. A writer thread drains it every ``flush_interval`` seconds and
+    writes each batch to ``stream`` in one call. When the stream cannot keep
+    up and the buffer fills, new records are dropped and the number dropped
+    is logged once output catches up, so a slow stderr never blocks a send.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[IO[str]] = None,
+        *,
+        level: int = logging.WARNING,
+        queue_size: int = 10000,
+        sample_rates: Optional[Mapping[str, float]] = None,
+        redact: bool = True,
+        flush_interval: float = 0.05,
+    ) -> None:
+        self.level = level
+        self.handler = DroppingBufferHandler(queue_size)
+        if sample_rates:
+            self.handler.addFilter(SamplingFilter(sample_rates))
+        self._stream = stream
+        self._formatter = JsonFormatter(redact=redact)
+        self._flush_interval = flush_interval
+        self._reported = 0
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._logger: Optional[logging.Logger] = None
+
+    def install(self, logger_name: str = "mcp_outlook") -> "LogPipeline":
+        """Route ``logger_name`` and its children through the pipeline."""
+        logger = logging.getLogger(logger_name)
+        logger.addHandler(self.handler)
+        logger.setLevel(self.level)
+        logger.propagate = False
+        self._logger = logger
+        self._thread = threading.Thread(target=self._run, name="mcp-outlook-log", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout: Optional[float] = 2.0) -> None:
+        """Detach from the logger and write out what is already buffered."""
+        if self._logger is not None:
+            self._logger.removeHandler(self.handler)
+            self._logger.propagate = True
+            self._logger = None
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {"queued": len(self.handler.buffer), "dropped": self.handler.dropped}
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self._flush_interval):
+            self._drain()
+        self._drain()
+
+    def _drain(self) -> None:
+        buffer = self.handler.buffer
+        lines = []
+        while buffer:
+            lines.append(self._render(buffer.popleft()))
+        dropped = self.handler.dropped
+        if dropped > self._reported:
+            count, self._reported = dropped - self._reported, dropped
+            lines.append(self._render(_dropped_record(count)))
+        if not lines:
+            return
+        stream = self._stream if self._stream is not None else sys.stderr
+        try:
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+        except Exception:
+            # Nowhere left to report a broken log stream; keep serving.
+            pass
+
+    def _render(self, record: logging.LogRecord) -> str:
+        try:
+            return self._formatter.format(record)
+        except Exception:
+            return json.dumps(
+                {"level": record.levelname, "logger": record.name, "message": "unformattable record"}
+            )
+
+
+def _dropped_record(count: int) -> logging.LogRecord:
+    return logging.makeLogRecord(
+        {
+            "name": "mcp_outlook.logging",
+            "levelno": logging.WARNING,
+            "levelname": "WARNING",
+            "msg": "Dropped %d log record(s) while output was falling behind.",
+            "args": (count,),
+            "event": "log.dropped",
+        }
+    )
+
+
+@lru_cache(maxsize=1)
+def get_log_pipeline() -> LogPipeline:
+    """Install the process-wide pipeline configured from the environment."""
+    settings = get_server_settings()
+    pipeline = LogPipeline(
+        level=logging.getLevelName(settings.log_level),
+        queue_size=settings.log_queue_size,
+        sample_rates=dict(settings.log_sample_rates),
+        redact=not settings.log_unredacted,
+    ).install()
+    atexit.register(pipeline.close)
+    return pipeline
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import cProfile
+from collections import Counter
+from functools import lru_cache, wraps
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+from .config import get_server_settings
+
+
+T = TypeVar("T")
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+class SendProfiler:
+    """
+    Opt-in CPU profiler for the send pipeline.
+
+    Once armed, the profiler captures the next ``calls`` send invocations or
+    every invocation within ``seconds``, whichever limit is reached first, and
+    then writes the result to ``output_dir``:
+
+    - ``cprofile`` mode writes a ``.pstats`` file (snakeviz, gprof2dot, flameprof).
+    - ``sample`` mode samples the stacks of in-flight calls and writes collapsed
+      ``.folded`` stacks (flamegraph.pl, speedscope, inferno).
+
+    While disarmed the only cost per call is one attribute check.
+    """
+
+    def __init__(self, output_dir: str, *, sample_interval: float = 0.001) -> None:
+        self._output_dir = output_dir
+        self._sample_interval = sample_interval
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("mcp_outlook.profiling")
+        self.armed = False
+        self._mode = "cprofile"
+        self._remaining: Optional[int] = None
+        self._captured = 0
+        self._stats: Optional[pstats.Stats] = None
+        self._cprofile_busy = threading.Lock()
+        self._samples: Counter[str] = Counter()
+        self._sampled_threads: set[int] = set()
+        self._sampler: Optional[threading.Thread] = None
+        self._timer: Optional[threading.Timer] = None
+        self._last_output: Optional[str] = None
+
+    def start(
+        self,
+        *,
+        calls: Optional[int] = None,
+        seconds: Optional[float] = None,
+        mode: str = "cprofile",
+    ) -> None:
+        """
+        Arm the profiler.
+
+        Raises:
+            ValueError: for an unknown mode, a non-positive limit, or when a
+                capture is already running.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}; expected one of {PROFILE_MODES}.")
+        if calls is None and seconds is None:
+            raise ValueError("Provide calls, seconds, or both to bound the capture.")
+        if (calls is not None and calls <= 0) or (seconds is not None and seconds <= 0):
+            raise ValueError("Profile limits must be positive.")
+
+        with self._lock:
+            if self.armed:
+                raise ValueError("A profile capture is already running.")
+            self._mode = mode
+            self._remaining = calls
+            self._captured = 0
+            self._stats = None
+            self._samples = Counter()
+            self._sampled_threads = set()
+            if mode == "sample":
+                self._sampler = threading.Thread(
+                    target=self._sample_loop, name="mcp-outlook-sampler", daemon=True
+                )
+            if seconds is not None:
+                self._timer = threading.Timer(seconds, self.stop)
+                self._timer.daemon = True
+            self.armed = True
+
+        if self._sampler is not None:
+            self._sampler.start()
+        if self._timer is not None:
+            self._timer.start()
+        self._logger.info(
+            "Send profiling armed: mode=%s calls=%s seconds=%s", mode, calls, seconds
+        )
+
+    def stop(self) -> Optional[str]:
+        """
+        Disarm the profiler and write captured data.
+
+        Returns:
+            The path of the written profile, or None if nothing was captured
+            or no capture was running.
+        """
+        with self._lock:
+            if not self.armed:
+                return None
+            self.armed = False
+            timer, self._timer = self._timer, None
+            sampler, self._sampler = self._sampler, None
+
+        if timer is not None and timer is not threading.current_thread():
+            timer.cancel()
+        if sampler is not None:
+            sampler.join()
+        # A call still inside _run_cprofile merges its stats on the way out;
+        # wait for it so they make it into the file.
+        with self._cprofile_busy:
+            pass
+        path = self._write()
+        self._last_output = path
+        return path
+
+    def status(self) -> dict:
+        return {
+            "armed": self.armed,
+            "mode": self._mode,
+            "remaining_calls": self._remaining,
+            "captured_calls": self._captured,
+            "last_output": self._last_output,
+        }
+
+    def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run ``fn`` under the active capture, if one is still armed."""
+        with self._lock:
+            mode = self._mode
+            take = self.armed and (self._remaining is None or self._remaining > 0)
+            # Only one cProfile hook can be active at a time on newer
+            # interpreters, so a call overlapping a profiled one runs
+            # unprofiled rather than wait, and does not count as captured.
+            if take and mode == "cprofile":
+                take = self._cprofile_busy.acquire(blocking=False)
+            if take and self._remaining is not None:
+                self._remaining -= 1
+            finished = take and self._remaining == 0
+
+        if not take:
+            return fn(*args, **kwargs)
+
+        try:
+            if mode == "sample":
+                return self._run_sampled(fn, *args, **kwargs)
+            return self._run_cprofile(fn, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._captured += 1
+            if finished:
+                self.stop()
+
+    def _run_cprofile(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        # The caller holds _cprofile_busy.
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profile)
+                    else:
+                        self._stats.add(profile)
+        finally:
+            self._cprofile_busy.release()
+
+    def _run_sampled(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        ident = threading.get_ident()
+        with self._lock:
+            self._sampled_threads.add(ident)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._sampled_threads.discard(ident)
+
+    def _sample_loop(self) -> None:
+        while self.armed:
+            with self._lock:
+                threads = set(self._sampled_threads)
+            if threads:
+                frames = sys._current_frames()
+                for ident in threads:
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        self._samples[_fold_stack(frame)] += 1
+            time.sleep(self._sample_interval)
+
+    def _write(self) -> Optional[str]:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(self._output_dir, f"send-{stamp}-{os.getpid()}")
+        os.makedirs(self._output_dir, exist_ok=True)
+
+        if self._mode == "cprofile":
+            if self._stats is None:
+                self._logger.info("Send profiling stopped with no captured calls.")
+                return None
+            path = f"{base}.pstats"
+            self._stats.dump_stats(path)
+        else:
+            if not self._samples:
+                self._logger.info("Send profiling stopped with no captured samples.")
+                return None
+            path = f"{base}.folded"
+            with open(path, "w", encoding="utf-8") as handle:
+                for stack, count in self._samples.most_common():
+                    handle.write(f"{stack} {count}\n")
+
+        self._logger.info(
+            "Send profile written: path=%s calls=%d", path, self._captured
+        )
+        return path
+
+
+def _fold_stack(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        parts.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+@lru_cache(maxsize=1)
+def get_send_profiler() -> SendProfiler:
+    """Return the process-wide profiler, armed from the environment if requested."""
+    settings = get_server_settings()
+    profiler = SendProfiler(settings.profile_dir)
+    if settings.profile_calls or settings.profile_seconds:
+        profiler.start(
+            calls=settings.profile_calls,
+            seconds=settings.profile_seconds,
+            mode=settings.profile_mode,
+        )
+    return profiler
+
+
+def profiled(fn: Callable[..., T]) -> Callable[..., T]:
+    """Route calls to ``fn`` through the send profiler while it is armed."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        profiler = get_send_profiler()
+        if not profiler.armed:
+            return fn(*args, **kwargs)
+        return profiler.run(fn, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+
+REDACTED = "REDACTED"
+
+# Request headers worth keeping in a cassette; everything else (notably
+# Authorization) is dropped.
+_KEPT_REQUEST_HEADERS = {"content-type", "accept"}
+_KEPT_RESPONSE_HEADERS = {"content-type", "retry-after", "location", "request-id"}
+# The recorded body is already decoded, so framing headers must not be
+# forwarded to the client or it would try to decode it again.
+_FRAMING_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+_SECRET_FORM_FIELDS = {"client_secret", "client_assertion", "password", "refresh_token"}
+_SECRET_JSON_FIELDS = {"access_token", "refresh_token", "id_token"}
+# Pre-authorized URLs, such as Graph upload sessions, carry their token in
+# the query. The URL is kept (with the token masked) so replays still match.
+_SECRET_URL_FIELDS = {"uploadUrl"}
+_SECRET_QUERY_FIELDS = {"authtoken", "access_token", "sig"}
+
+
+class ReplayError(RuntimeError):
+    """Raised when a replayed request has no matching recorded exchange."""
+
+
+def _redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    fields = [
+        (key, REDACTED if key.lower() in _SECRET_QUERY_FIELDS else value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(fields)))
+
+
+def _redact_request_body(request: httpx.Request) -> str:
+    body = request.content.decode("utf-8", errors="replace")
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        fields = [
+            (key, REDACTED if key in _SECRET_FORM_FIELDS else value)
+            for key, value in parse_qsl(body, keep_blank_values=True)
+        ]
+        return urlencode(fields)
+    return body
+
+
+def _redact_response_body(content: bytes, content_type: str) -> dict:
+    if content_type.startswith("application/json"):
+        try:
+            payload = json.loads(content)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            for field in _SECRET_JSON_FIELDS & payload.keys():
+                payload[field] = REDACTED
+            for field in _SECRET_URL_FIELDS & payload.keys():
+                if isinstance(payload[field], str):
+                    payload[field] = _redact_url(payload[field])
+            return {"json": payload}
+    try:
+        return {"text": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """
+    Pass requests through to a real transport and append each exchange to a
+    JSON-lines cassette with secrets and bearer tokens removed.
+    """
+
+    def __init__(self, path: str, transport: Optional[httpx.BaseTransport] = None) -> None:
+        self._path = path
+        self._transport = transport or httpx.HTTPTransport()
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("mcp_outlook.replay")
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        content = response.read()
+        elapsed = time.perf_counter() - started
+
+        content_type = response.headers.get("content-type", "")
+        entry = {
+            "method": request.method,
+            "url": _redact_url(str(request.url)),
+            "request_headers": {
+                key: value
+                for key, value in request.headers.items()
+                if key.lower() in _KEPT_REQUEST_HEADERS
+            },
+            "request_body": _redact_request_body(request),
+            "status": response.status_code,
+            "headers": {
+                key: value
+                for key, value in response.headers.items()
+                if key.lower() in _KEPT_RESPONSE_HEADERS
+            },
+            "elapsed": elapsed,
+            **_redact_response_body(content, content_type),
+        }
+        with self._lock:
+            with open(self._path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry) + "\n")
+        self._logger.debug("Recorded %s %s (%.3fs)", request.method, entry["url"], elapsed)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=[
+                (key, value)
+                for key, value in response.headers.multi_items()
+                if key.lower() not in _FRAMING_HEADERS
+            ],
+            content=content,
+            request=request,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """
+    Serve responses from a cassette written by ``RecordingTransport``.
+
+    Each request is matched to the next unused exchange with the same method
+    and URL. With ``realtime`` enabled the recorded latency (scaled by
+    ``speed``) is reproduced before responding; with ``loop`` enabled the
+    cassette restarts once every exchange has been used, which lets
+    benchmarks run more calls than were recorded.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        realtime: bool = True,
+        speed: float = 1.0,
+        loop: bool = False,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        with open(path, encoding="utf-8") as handle:
+            self._entries = [json.loads(line) for line in handle if line.strip()]
+        self._realtime = realtime
+        self._speed = speed
+        self._loop = loop
+        self._sleep = sleep
+        self._used = [False] * len(self._entries)
+        self._lock = threading.Lock()
+
+    def _take(self, method: str, url: str) -> dict:
+        with self._lock:
+            for attempt in range(2):
+                for index, entry in enumerate(self._entries):
+                    if not self._used[index] and entry["method"] == method and entry["url"] == url:
+                        self._used[index] = True
+                        return entry
+                if not (self._loop and attempt == 0):
+                    break
+                # Only recycle exchanges for this endpoint, so other
+                # endpoints keep their position in the cassette.
+                for index, entry in enumerate(self._entries):
+                    if entry["method"] == method and entry["url"] == url:
+                        self._used[index] = False
+        raise ReplayError(f"No recorded exchange left for {method} {url}")
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        entry = self._take(request.method, _redact_url(str(request.url)))
+        if self._realtime and entry.get("elapsed"):
+            self._sleep(entry["elapsed"] / self._speed)
+
+        if "json" in entry:
+            content = json.dumps(entry["json"]).encode("utf-8")
+        elif "base64" in entry:
+            content = base64.b64decode(entry["base64"])
+        else:
+            content = entry.get("text", "").encode("utf-8")
+
+        return httpx.Response(
+            status_code=entry["status"],
+            headers=entry.get("headers", {}),
+            content=content,
+            request=request,
+        )
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import heapq
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .state import StateStore
+
+
+Dispatch = Callable[[str, dict, dict], str]
+
+# Seconds before sends whose claim failed (e.g. the store stayed busy) are
+# tried again.
+CLAIM_RETRY_DELAY = 5.0
+
+
+def parse_send_at(send_at: str, tz_name: Optional[str] = None) -> float:
+    """
+    Convert an ISO 8601 timestamp into a POSIX time.
+
+    A timestamp without an offset is read in ``tz_name`` (an IANA zone such as
+    ``"Europe/Berlin"``), or UTC when no zone is given.
+
+    Raises:
+        ValueError: for a malformed timestamp or an unknown time zone.
+    """
+    try:
+        moment = datetime.fromisoformat(send_at)
+    except ValueError as exc:
+        raise ValueError(f"send_at must be an ISO 8601 timestamp, got {send_at!r}.") from exc
+
+    if moment.tzinfo is None:
+        try:
+            zone = ZoneInfo(tz_name) if tz_name else timezone.utc
+        except ZoneInfoNotFoundError as exc:
+            raise ValueError(f"Unknown time zone {tz_name!r}.") from exc
+        moment = moment.replace(tzinfo=zone)
+    return moment.timestamp()
+
+
+class MailScheduler:
+    """
+    Release scheduled sends to the normal send path when they fall due.
+
+    Pending sends live in the ``StateStore`` so they survive restarts; in
+    memory the scheduler keeps only a heap of ``(due, id)`` pairs and one timer
+    thread that sleeps until the earliest entry is due, so idle cost does not
+    grow with the number of pending sends. Due sends are claimed and
+    dispatched at most ``batch_size`` at a time, ``batch_interval`` seconds
+    apart, so a burst scheduled for the same minute is spread out.
+
+    Credentials are held in memory only and are never written to the store;
+    a send with caller-supplied credentials records which scheduler holds
+    them, and that scheduler keeps a lease in the store while it does. Other
+    schedulers sharing the store leave such a send alone while the lease is
+    live. Once it lapses (the owner stopped or crashed) the send is marked
+    failed rather than sent with whatever credentials the server itself is
+    configured with. Sends scheduled without credentials use the server's
+    credentials and can be released by any scheduler.
+    """
+
+    def __init__(
+        self,
+        store: StateStore,
+        dispatch: Dispatch,
+        *,
+        batch_size: int = 20,
+        batch_interval: float = 1.0,
+        stale_after: float = 300.0,
+        result_ttl: float = 86400.0,
+        lease_ttl: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._store = store
+        self._dispatch = dispatch
+        self._batch_size = max(1, batch_size)
+        self._batch_interval = batch_interval
+        self._stale_after = stale_after
+        self._result_ttl = result_ttl
+        self._lease_ttl = lease_ttl
+        self._clock = clock
+        self._id = uuid.uuid4().hex
+        self._lease_name = f"scheduler:{self._id}"
+        self._renew_at = float("-inf")
+        self._heap: list[tuple[float, str]] = []
+        self._credentials: dict[str, dict] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._pool = ThreadPoolExecutor(
+            max_workers=self._batch_size, thread_name_prefix="mcp-outlook-scheduled"
+        )
+        self._logger = logging.getLogger("mcp_outlook.scheduler")
+
+    def start(self) -> None:
+        """Load pending sends from the store and start the timer thread."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            for schedule_id, due in self._store.pending_scheduled(self._stale_after):
+                heapq.heappush(self._heap, (due, schedule_id))
+            self._thread = threading.Thread(
+                target=self._run, name="mcp-outlook-scheduler", daemon=True
+            )
+            self._thread.start()
+        self._logger.info("Scheduler started with %d pending send(s)", len(self._heap))
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pool.shutdown(wait=True)
+        # The credentials go with this process; let other schedulers fail
+        # the sends that needed them without waiting for the lease to lapse.
+        try:
+            self._store.release_lease(self._lease_name)
+        except Exception:
+            self._logger.exception("Could not release the scheduler lease")
+
+    def schedule(self, due: float, payload: dict, credentials: Optional[dict] = None) -> str:
+        """
+        Persist a send for ``due`` (POSIX time) and return its schedule id.
+        """
+        schedule_id = uuid.uuid4().hex
+        if credentials:
+            self._renew_lease()
+        self._store.add_scheduled(
+            schedule_id, due, json.dumps(payload), owner=self._id if credentials else None
+        )
+        with self._cond:
+            if credentials:
+                self._credentials[schedule_id] = credentials
+            heapq.heappush(self._heap, (due, schedule_id))
+            # Only wake the timer if this send is now the earliest one.
+            if self._heap[0][1] == schedule_id:
+                self._cond.notify()
+        return schedule_id
+
+    def cancel(self, schedule_id: str) -> bool:
+        """Cancel a send that has not been released yet."""
+        cancelled = self._store.cancel_scheduled(schedule_id)
+        if cancelled:
+            with self._cond:
+                self._credentials.pop(schedule_id, None)
+        # The heap entry is dropped lazily: claiming a cancelled send fails.
+        return cancelled
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _run(self) -> None:
+        while True:
+            renew = False
+            with self._cond:
+                while not self._stopping:
+                    delay = self._heap[0][0] - self._clock() if self._heap else None
+                    if delay is not None and delay <= 0:
+                        break
+                    # Keep the lease live while holding anyone's credentials.
+                    if self._credentials:
+                        until_renew = self._renew_at - time.monotonic()
+                        if until_renew <= 0:
+                            renew = True
+                            break
+                        delay = until_renew if delay is None else min(delay, until_renew)
+                    self._cond.wait(delay)
+                if self._stopping:
+                    return
+
+                if not renew:
+                    now = self._clock()
+                    batch: list[str] = []
+                    while (
+                        self._heap and self._heap[0][0] <= now and len(batch) < self._batch_size
+                    ):
+                        # start() may load a send that schedule() already queued.
+                        schedule_id = heapq.heappop(self._heap)[1]
+                        if schedule_id not in batch:
+                            batch.append(schedule_id)
+                    credentials = {
+                        schedule_id: self._credentials.pop(schedule_id, {})
+                        for schedule_id in batch
+                    }
+
+            if renew:
+                self._renew_lease()
+                continue
+
+            try:
+                self._release(batch, credentials)
+            except Exception:
+                # Keep the timer alive: later sends must still fire.
+                self._logger.exception("Releasing scheduled sends failed")
+
+            # Hold the next batch back by batch_interval even if new sends
+            # arrive and notify the condition in the meantime.
+            resume_at = time.monotonic() + self._batch_interval
+            with self._cond:
+                while not self._stopping and self._heap and self._heap[0][0] <= self._clock():
+                    remaining = resume_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+    def _renew_lease(self) -> None:
+        self._renew_at = time.monotonic() + self._lease_ttl / 3
+        try:
+            self._store.try_acquire_lease(self._lease_name, self._lease_ttl)
+        except Exception:
+            self._logger.exception("Could not renew the scheduler lease")
+
+    def _release(self, batch: list[str], credentials: dict[str, dict]) -> None:
+        try:
+            claimed, deferred = self._store.claim_scheduled(
+                batch, self._stale_after, owner=self._id
+            )
+        except Exception:
+            self._logger.exception("Could not claim scheduled sends; retrying")
+            retry_at = self._clock() + CLAIM_RETRY_DELAY
+            with self._cond:
+                for schedule_id in batch:
+                    heapq.heappush(self._heap, (retry_at, schedule_id))
+                    if credentials.get(schedule_id):
+                        self._credentials[schedule_id] = credentials[schedule_id]
+            return
+        if deferred:
+            # Another live scheduler holds these sends' credentials and will
+            # release them; look again once its lease could have lapsed.
+            retry_at = self._clock() + self._lease_ttl
+            with self._cond:
+                for schedule_id in deferred:
+                    heapq.heappush(self._heap, (retry_at, schedule_id))
+        self._logger.info("Releasing %d scheduled send(s)", len(claimed))
+        futures = []
+        for schedule_id, payload, needs_credentials in claimed:
+            supplied = credentials.get(schedule_id, {})
+            if needs_credentials and not supplied:
+                self._logger.warning(
+                    "Scheduled send %s lost its caller credentials; not sending", schedule_id
+                )
+                self._finish(
+                    schedule_id,
+                    "failed",
+                    "The credentials supplied when this send was scheduled are no longer "
+                    "available (the server that held them stopped); schedule it again.",
+                )
+                continue
+            futures.append(
+                self._pool.submit(self._send_one, schedule_id, json.loads(payload), supplied)
+            )
+        for future in futures:
+            future.result()
+
+    def _send_one(self, schedule_id: str, payload: dict, credentials: dict) -> None:
+        try:
+            result = self._dispatch(schedule_id, payload, credentials)
+        except Exception as exc:
+            self._logger.warning("Scheduled send %s failed: %s", schedule_id, exc)
+            self._finish(schedule_id, "failed", str(exc))
+            return
+        self._finish(schedule_id, "sent", result)
+
+    def _finish(self, schedule_id: str, status: str, result: str) -> None:
+        try:
+            self._store.finish_scheduled(schedule_id, status, result, self._result_ttl)
+        except Exception:
+            # The send stays "sending" and is re-claimed once stale; its
+            # idempotency key keeps a delivered message from going out twice.
+            self._logger.exception(
+                "Could not record outcome %r of scheduled send %s", status, schedule_id
+            )
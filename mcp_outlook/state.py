@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from .config import get_server_settings
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    key TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expiry REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scheduled (
+    id TEXT PRIMARY KEY,
+    due REAL NOT NULL,
+    payload TEXT NOT NULL,
+    caller_credentials INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    status TEXT NOT NULL,
+    claimed_at REAL,
+    result TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scheduled_status_due ON scheduled (status, due);
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    result TEXT,
+    expires REAL NOT NULL
+);
+"""
+
+
+def _open_private(path: str) -> None:
+    """
+    Create ``path`` readable only by the current user, or check an existing one.
+
+    The database caches bearer tokens, so a file planted by another local
+    user, or a symlink to one, must not be adopted.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+    try:
+        info = os.fstat(fd)
+        if hasattr(os, "getuid") and info.st_uid != os.getuid():
+            raise PermissionError(f"State store {path} is owned by another user.")
+        if info.st_mode & 0o077:
+            os.fchmod(fd, 0o600)
+    finally:
+        os.close(fd)
+
+
+class StateStore:
+    """
+    SQLite-backed state shared between server worker processes.
+
+    Every worker that opens the same database file sees the same token cache,
+    rate-limit buckets, idempotency records, and scheduled sends. Without a
+    path (or with ``":memory:"``) the store is held in memory, shared only
+    between threads of the current process, and lost on exit.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        busy_timeout: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._path = path or ":memory:"
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._owner = uuid.uuid4().hex
+        self._logger = logging.getLogger("mcp_outlook.state")
+
+        if self._path != ":memory:":
+            _open_private(self._path)
+
+        self._conn = sqlite3.connect(
+            self._path,
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        if self._path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def is_shared(self) -> bool:
+        """Whether other processes can open this store."""
+        return self._path != ":memory:"
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, fn):
+        # BEGIN IMMEDIATE takes the database write lock up front so that
+        # read-modify-write sequences are atomic across processes.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    # Token cache -------------------------------------------------------
+
+    def get_token(self, key: str) -> Optional[tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT token, expiry FROM tokens WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], float(row[1])
+
+    def put_token(self, key: str, token: str, expiry: float) -> None:
+        def apply(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "INSERT INTO tokens (key, token, expiry) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET token = excluded.token, expiry = excluded.expiry",
+                (key, token, expiry),
+            )
+            conn.execute("DELETE FROM tokens WHERE expiry < ?", (self._clock(),))
+
+        self._write(apply)
+
+    # Leases ------------------------------------------------------------
+
+    def try_acquire_lease(self, name: str, ttl: float) -> bool:
+        """
+        Take a short-lived exclusive lease, e.g. to refresh a shared token.
+
+        Returns:
+            bool: True if this store instance now holds the lease.
+        """
+        now = self._clock()
+
+        def apply(conn: sqlite3.Connection) -> bool:
+            row = conn.execute(
+                "SELECT owner, expires FROM leases WHERE name = ?", (name,)
+            ).fetchone()
+            if row is not None and row[0] != self._owner and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires",
+                (name, self._owner, now + ttl),
+            )
+            return True
+
+        return self._write(apply)
+
+    def release_lease(self, name: str) -> None:
+        self._write(
+            lambda conn: conn.execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ?", (name, self._owner)
+            )
+        )
+
+    # Rate limiting -----------------------------------------------------
+
+    def consume(
+        self,
+        key: str,
+        *,
+        rate: float,
+        capacity: float,
+        cost: float = 1.0,
+    ) -> float:
+        """
+        Take ``cost`` tokens from the bucket ``key`` if available.
+
+        Args:
+            rate: refill rate in tokens per second.
+            capacity: maximum number of tokens the bucket holds.
+
+        Returns:
+            float: 0.0 when the tokens were taken, otherwise the number of
+            seconds until enough tokens will be available.
+        """
+        now = self._clock()
+
+        def apply(conn: sqlite3.Connection) -> float:
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+
+            if tokens < cost:
+                conn.execute(
+                    "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    (key, tokens, now),
+                )
+                return (cost - tokens) / rate if rate > 0 else float("inf")
+
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens - cost, now),
+            )
+            return 0.0
+
+        return self._write(apply)
+
+    # Idempotency -------------------------------------------------------
+
+    def claim_idempotency(
+        self, key: str, pending_ttl: float
+    ) -> Optional[tuple[str, Optional[str]]]:
+        """
+        Claim an idempotency key for a new operation.
+
+        The claim only lives for ``pending_ttl`` seconds, which should cover
+        one attempt, so a worker that dies mid-send does not block the key for
+        long. ``complete_idempotency`` sets the retention of the result.
+
+        Returns:
+            None if the key was claimed by this call, otherwise the existing
+            ``(status, result)`` where status is ``"pending"`` or ``"done"``.
+        """
+        now = self._clock()
+
+        def apply(conn: sqlite3.Connection) -> Optional[tuple[str, Optional[str]]]:
+            conn.execute("DELETE FROM idempotency WHERE expires < ?", (now,))
+            row = conn.execute(
+                "SELECT status, result FROM idempotency WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                return row[0], row[1]
+            conn.execute(
+                "INSERT INTO idempotency (key, status, result, expires) VALUES (?, 'pending', NULL, ?)",
+                (key, now + pending_ttl),
+            )
+            return None
+
+        return self._write(apply)
+
+    def complete_idempotency(self, key: str, result: str, ttl: float) -> None:
+        self._write(
+            lambda conn: conn.execute(
+                "UPDATE idempotency SET status = 'done', result = ?, expires = ? WHERE key = ?",
+                (result, self._clock() + ttl, key),
+            )
+        )
+
+    def release_idempotency(self, key: str) -> None:
+        self._write(
+            lambda conn: conn.execute(
+                "DELETE FROM idempotency WHERE key = ? AND status = 'pending'", (key,)
+            )
+        )
+
+    # Scheduled sends ---------------------------------------------------
+
+    def add_scheduled(
+        self, schedule_id: str, due: float, payload: str, owner: Optional[str] = None
+    ) -> None:
+        """
+        Persist a pending send.
+
+        Args:
+            owner: for a send that must use credentials supplied by the
+                caller, the id of the scheduler holding them in memory. The
+                credentials themselves are never stored. While the lease
+                ``scheduler:<owner>`` is live, only that scheduler can claim
+                the send.
+        """
+        self._write(
+            lambda conn: conn.execute(
+                "INSERT INTO scheduled "
+                "(id, due, payload, caller_credentials, owner, status, updated) "
+                "VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+                (schedule_id, due, payload, int(owner is not None), owner, self._clock()),
+            )
+        )
+
+    def pending_scheduled(self, stale_after: float) -> list[tuple[str, float]]:
+        """Return ``(id, due)`` for sends that still need to be dispatched."""
+        cutoff = self._clock() - stale_after
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, due FROM scheduled WHERE status = 'pending' "
+                "OR (status = 'sending' AND claimed_at < ?)",
+                (cutoff,),
+            ).fetchall()
+        return [(row[0], float(row[1])) for row in rows]
+
+    def claim_scheduled(
+        self, schedule_ids: list[str], stale_after: float, owner: Optional[str] = None
+    ) -> tuple[list[tuple[str, str, bool]], list[str]]:
+        """
+        Atomically mark scheduled sends as in flight.
+
+        A send left ``sending`` for longer than ``stale_after`` seconds (e.g.
+        by a crashed worker) can be claimed again. A send owned by another
+        scheduler whose lease is still live is left alone.
+
+        Args:
+            owner: the claiming scheduler's id.
+
+        Returns:
+            ``(id, payload, caller_credentials)`` for each send this call
+            claimed, and the ids left to their live owners.
+        """
+        now = self._clock()
+
+        def apply(conn: sqlite3.Connection) -> tuple[list[tuple[str, str, bool]], list[str]]:
+            claimed, deferred = [], []
+            for schedule_id in schedule_ids:
+                row = conn.execute(
+                    "SELECT s.payload, s.caller_credentials, s.owner, l.expires "
+                    "FROM scheduled s LEFT JOIN leases l ON l.name = 'scheduler:' || s.owner "
+                    "WHERE s.id = ? AND (s.status = 'pending' "
+                    "OR (s.status = 'sending' AND s.claimed_at < ?))",
+                    (schedule_id, now - stale_after),
+                ).fetchone()
+                if row is None:
+                    continue
+                payload, caller_credentials, row_owner, lease_expires = row
+                owned_elsewhere = row_owner is not None and row_owner != owner
+                if owned_elsewhere and lease_expires is not None and lease_expires > now:
+                    deferred.append(schedule_id)
+                    continue
+                conn.execute(
+                    "UPDATE scheduled SET status = 'sending', claimed_at = ?, updated = ? "
+                    "WHERE id = ?",
+                    (now, now, schedule_id),
+                )
+                claimed.append((schedule_id, payload, bool(caller_credentials)))
+            return claimed, deferred
+
+        return self._write(apply)
+
+    def finish_scheduled(self, schedule_id: str, status: str, result: str, ttl: float) -> None:
+        now = self._clock()
+
+        def apply(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "UPDATE scheduled SET status = ?, result = ?, updated = ? WHERE id = ?",
+                (status, result, now, schedule_id),
+            )
+            conn.execute(
+                "DELETE FROM scheduled WHERE status IN ('sent', 'failed', 'cancelled') "
+                "AND updated < ?",
+                (now - ttl,),
+            )
+
+        self._write(apply)
+
+    def cancel_scheduled(self, schedule_id: str) -> bool:
+        cursor = self._write(
+            lambda conn: conn.execute(
+                "UPDATE scheduled SET status = 'cancelled', updated = ? "
+                "WHERE id = ? AND status = 'pending'",
+                (self._clock(), schedule_id),
+            )
+        )
+        return bool(cursor.rowcount)
+
+    def get_scheduled(self, schedule_id: str) -> Optional[tuple[float, str, Optional[str]]]:
+        """Return ``(due, status, result)`` for a scheduled send."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT due, status, result FROM scheduled WHERE id = ?", (schedule_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return float(row[0]), row[1], row[2]
+
+
+@lru_cache(maxsize=1)
+def get_state_store() -> StateStore:
+    """Return the process-wide state store configured by ``MCP_OUTLOOK_STATE_PATH``."""
+    settings = get_server_settings()
+    path = settings.state_path
+    if path and path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+    return StateStore(path)
@@ -0,0 +1,112 @@
+"""Per-call logging overhead on the send hot path, before and after the pipeline.
+
+Replays the log calls made by one successful send (prepare, strategy,
+token fetch, accepted) plus an occasional Graph error with a large body. It
+runs them through a synchronous stream handler, which is how records reached
+stderr before, and then through ``LogPipeline``. Both write to a stream whose
+writes take ``--write-latency`` seconds, to simulate a slow stderr pipe:
+
+    python scripts/bench_logging.py --sends 5000 --write-latency 0.0002
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcp_outlook.log_pipeline import LogPipeline  # noqa: E402
+
+
+class SlowStream(io.TextIOBase):
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.lines = 0
+
+    def write(self, text: str) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        self.lines += 1
+        return len(text)
+
+
+def send_calls(logger: logging.Logger, index: int, error_body: str) -> None:
+    subject = f"Quarterly report {index}"
+    logger.info(
+        "Preparing sendMail request: to_count=%d, dry_run=%s",
+        3,
+        False,
+        extra={"event": "send.prepare", "subject": subject},
+    )
+    logger.info("Fetched new Microsoft Graph access token.", extra={"event": "auth.fetched"})
+    logger.info("Sending via %s strategy", "inline", extra={"event": "send.strategy"})
+    if index % 10 == 0:
+        logger.warning(
+            "Graph sendMail HTTP error: status=%s detail=%s",
+            429,
+            error_body,
+            extra={"event": "send.http_error", "subject": subject},
+        )
+    logger.info(
+        "Microsoft Graph accepted message: to_count=%d",
+        3,
+        extra={"event": "send.accepted", "subject": subject},
+    )
+
+
+def run(name: str, sends: int, latency: float, gap: float, sample: dict[str, float]) -> dict:
+    logger = logging.getLogger(f"mcp_outlook.bench.{name}")
+    stream = SlowStream(latency)
+    error_body = json.dumps({"error": {"message": "Throttled for user@example.com " + "x" * 4000}})
+
+    pipeline = None
+    if name == "sync":
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    else:
+        pipeline = LogPipeline(stream, level=logging.INFO, sample_rates=sample).install(logger.name)
+
+    elapsed = 0.0
+    for index in range(sends):
+        started = time.perf_counter()
+        send_calls(logger, index, error_body)
+        elapsed += time.perf_counter() - started
+        if gap:
+            time.sleep(gap)
+
+    dropped = 0
+    if pipeline is not None:
+        dropped = pipeline.stats()["dropped"]
+        pipeline.close(timeout=None)
+    return {
+        "us_per_send": round(elapsed / sends * 1e6, 1),
+        "lines_written": stream.lines,
+        "dropped": dropped,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sends", type=int, default=2000)
+    parser.add_argument("--write-latency", type=float, default=0.0002)
+    parser.add_argument("--gap", type=float, default=0.001)
+    args = parser.parse_args()
+
+    sample = {"send.prepare": 0.1, "send.strategy": 0.1, "auth.fetched": 0.1}
+    results = {
+        name: run(name, args.sends, args.write_latency, args.gap, rates)
+        for name, rates in (("sync", {}), ("pipeline", {}), ("pipeline_sampled", sample))
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Time and memory benchmark for large recipient lists.
+
+Compares the per-recipient pydantic models and payload dicts used before
+``RecipientList`` with the compact representation, from validation through
+to the serialised sendMail body:
+
+    python scripts/bench_recipients.py --recipients 10000 --duplicates 0.1
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from mcp_outlook.email import (  # noqa: E402
+    Recipient,
+    RecipientList,
+    _graph_fragment,
+    _normalize_address,
+)
+
+
+_LEGACY_LIST = TypeAdapter(List[Recipient])
+
+
+def legacy(addresses: list[str]) -> bytes:
+    """The previous path: a model per address, dedupe, then dicts for httpx."""
+    seen = set()
+    unique = []
+    for item in _LEGACY_LIST.validate_python(addresses):
+        key = item.address.casefold()
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    payload = {"message": {"bccRecipients": [item.to_graph() for item in unique]}}
+    return json.dumps(payload).encode()
+
+
+def compact(addresses: list[str]) -> bytes:
+    recipients = RecipientList(addresses)
+    return ('{"message":{"bccRecipients":' + recipients.to_graph_json() + "}}").encode()
+
+
+def clear_caches() -> None:
+    _normalize_address.cache_clear()
+    _graph_fragment.cache_clear()
+
+
+def measure(
+    fn: Callable[[list[str]], bytes],
+    addresses: list[str],
+    repeat: int,
+    before: Optional[Callable[[], None]] = None,
+) -> dict:
+    timings = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        body = fn(addresses)
+        timings.append(time.perf_counter() - started)
+
+    if before:
+        before()
+    tracemalloc.start()
+    fn(addresses)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_ms": round(min(timings) * 1000, 2),
+        "peak_kib": round(peak / 1024, 1),
+        "body_bytes": len(body),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=10000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Fraction of repeated addresses.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    unique = int(args.recipients * (1 - args.duplicates)) or 1
+    addresses = [f"member{i % unique}@Example.com" for i in range(args.recipients)]
+
+    results = {
+        "legacy": measure(legacy, addresses, args.repeat),
+        "compact_cold": measure(compact, addresses, args.repeat, before=clear_caches),
+    }
+    results["compact_warm"] = measure(compact, addresses, args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Offline latency/throughput regression benchmark using recorded Graph traffic.
+
+Record a cassette once against the live services (needs real credentials and
+sends one real message):
+
+    python scripts/bench_replay.py record cassettes/graph.jsonl --to you@example.com
+
+Replay it offline, e.g. in CI, and compare against a saved baseline:
+
+    python scripts/bench_replay.py run cassettes/graph.jsonl --calls 500 --threads 8 \\
+        --save bench.json --baseline baseline.json --tolerance 0.15
+
+Secrets are redacted from the cassette, so replay uses placeholder
+credentials for the tenant and client recorded in it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def record(args: argparse.Namespace) -> None:
+    os.environ["MCP_OUTLOOK_HTTP_RECORD"] = args.cassette
+    from server import send_outlook_mail_impl
+
+    result = send_outlook_mail_impl(
+        subject=args.subject,
+        body="Recorded by scripts/bench_replay.py.",
+        to=args.to,
+        sender=args.sender,
+    )
+    print(result)
+    print(f"Cassette written to {args.cassette}")
+
+
+def _credentials_from_cassette(path: str) -> dict:
+    credentials: dict = {}
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            entry = json.loads(line)
+            url = urlparse(entry["url"])
+            if url.path.endswith("/oauth2/v2.0/token"):
+                form = parse_qs(entry.get("request_body", ""))
+                credentials.update(
+                    tenant_id=url.path.split("/")[1],
+                    client_id=form.get("client_id", [""])[0],
+                    client_secret="replay",
+                )
+            elif url.path.endswith("/sendMail") and "/users/" in url.path:
+                credentials["sender"] = unquote(url.path.split("/users/")[1].split("/")[0])
+    if not credentials.get("tenant_id"):
+        # Delegated-token recordings carry no token exchange.
+        credentials["access_token"] = "replay"
+    return credentials
+
+
+def run(args: argparse.Namespace) -> int:
+    os.environ["MCP_OUTLOOK_HTTP_REPLAY"] = args.cassette
+    os.environ["MCP_OUTLOOK_HTTP_REPLAY_SPEED"] = str(args.speed)
+    from server import send_outlook_mail_impl
+
+    credentials = _credentials_from_cassette(args.cassette)
+
+    def one_call(index: int) -> float:
+        started = time.perf_counter()
+        send_outlook_mail_impl(
+            subject=f"Replay {index}",
+            body="Replay benchmark payload. " * 40,
+            to=[f"user{i}@example.com" for i in range(args.recipients)],
+            **credentials,
+        )
+        return time.perf_counter() - started
+
+    one_call(-1)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        latencies = sorted(pool.map(one_call, range(args.calls)))
+    elapsed = time.perf_counter() - started
+
+    results = {
+        "calls": args.calls,
+        "threads": args.threads,
+        "throughput": args.calls / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+    print(json.dumps(results, indent=2))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    failures = []
+    if results["throughput"] < baseline["throughput"] * (1 - args.tolerance):
+        failures.append(
+            f"throughput {results['throughput']:.1f}/s < baseline {baseline['throughput']:.1f}/s"
+        )
+    if results["p95_ms"] > baseline["p95_ms"] * (1 + args.tolerance):
+        failures.append(f"p95 {results['p95_ms']:.1f}ms > baseline {baseline['p95_ms']:.1f}ms")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="Send one live message and record the exchange")
+    rec.add_argument("cassette")
+    rec.add_argument("--to", nargs="+", required=True)
+    rec.add_argument("--sender", default=os.environ.get("GRAPH_DEFAULT_SENDER"))
+    rec.add_argument("--subject", default="bench_replay recording")
+
+    rep = commands.add_parser("run", help="Replay a cassette and measure latency/throughput")
+    rep.add_argument("cassette")
+    rep.add_argument("--calls", type=int, default=200)
+    rep.add_argument("--threads", type=int, default=8)
+    rep.add_argument("--recipients", type=int, default=10)
+    rep.add_argument("--speed", type=float, default=1.0, help="Replay latency divisor")
+    rep.add_argument("--save")
+    rep.add_argument("--baseline")
+    rep.add_argument("--tolerance", type=float, default=0.15)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args)
+        return 0
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Load benchmark: dry-run throughput of the HTTP transport by worker count.
+
+Starts ``server.py --transport http`` once per worker count, fires concurrent
+``send_outlook_mail`` dry-run calls at it, and prints requests/second. Dry runs
+exercise validation and JSON encoding without touching Microsoft Graph.
+
+Usage:
+    python scripts/bench_workers.py --workers 1 2 4 --requests 2000 --concurrency 64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+
+ROOT = Path(__file__).resolve().parent.parent
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json, text/event-stream",
+}
+
+
+def build_call(request_id: int, recipients: int) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {
+            "name": "send_outlook_mail",
+            "arguments": {
+                "subject": f"Benchmark {request_id}",
+                "body": "Load benchmark payload. " * 40,
+                "to": [f"user{i}@example.com" for i in range(recipients)],
+                "dry_run": True,
+            },
+        },
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+
+
+async def drive(url: str, total: int, concurrency: int, recipients: int) -> float:
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        # Warm up every worker's imports and pydantic schemas.
+        for i in range(concurrency):
+            await client.post(url, headers=HEADERS, json=build_call(-i, recipients))
+
+        async def consumer() -> None:
+            while True:
+                try:
+                    request_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                response = await client.post(
+                    url, headers=HEADERS, json=build_call(request_id, recipients)
+                )
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(consumer() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+def run_one(workers: int, total: int, concurrency: int, recipients: int) -> float:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["MCP_OUTLOOK_STATE_PATH"] = os.path.join(tmp, "state.sqlite3")
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "server.py",
+                "--transport",
+                "http",
+                "--port",
+                str(port),
+                "--workers",
+                str(workers),
+            ],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port)
+            elapsed = asyncio.run(
+                drive(f"http://127.0.0.1:{port}/mcp", total, concurrency, recipients)
+            )
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--recipients", type=int, default=50)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'workers':>7}  {'req/s':>9}  {'speedup':>7}")
+    for workers in args.workers:
+        elapsed = run_one(workers, args.requests, args.concurrency, args.recipients)
+        rate = args.requests / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>7}  {rate:>9.1f}  {rate / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
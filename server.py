@@ -1,34 +1,82 @@
 from __future__ import annotations
 
+import argparse
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache, partial
 import json
 import logging
 from typing import Optional, Sequence, Union
 
+import anyio
 import httpx
 from fastmcp import FastMCP
 
 from mcp_outlook.auth import GraphAuthError, GraphTokenManager
-from mcp_outlook.config import ConfigurationError, get_graph_settings
+from mcp_outlook.config import (
+    ConfigurationError,
+    GraphSettings,
+    ServerSettings,
+    get_graph_settings,
+    get_server_settings,
+)
+from mcp_outlook.concurrency import (
+    THROTTLE_STATUS,
+    ConcurrencyLimitError,
+    get_concurrency_controller,
+)
+from mcp_outlook.deadline import Deadline, SendAbortedError
+from mcp_outlook.drafts import DraftSender, choose_send_strategy, draft_time_allowance
 from mcp_outlook.email import (
     EmailBodyType,
     FileAttachment,
     MessageBody,
     SendMailRequest,
 )
+from mcp_outlook.inline_images import (
+    InlineImageReport,
+    extract_inline_images,
+    get_inline_image_cache,
+)
+from mcp_outlook.http_client import get_http_client
+from mcp_outlook.log_pipeline import get_log_pipeline
+from mcp_outlook.profiling import get_send_profiler, profiled
+from mcp_outlook.scheduler import MailScheduler, parse_send_at
+from mcp_outlook.state import StateStore, get_state_store
+
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP):
+    # Runs for every entry point (``fastmcp run``, ``main()``, and the HTTP
+    # app), so logging goes through the pipeline and scheduled sends reloaded
+    # from the store fire without waiting for a scheduling tool call.
+    pipeline = get_log_pipeline()
+    scheduler = get_mail_scheduler()
+    try:
+        yield {}
+    finally:
+        scheduler.stop(timeout=5.0)
+        get_mail_scheduler.cache_clear()
+        pipeline.close()
+        get_log_pipeline.cache_clear()
 
 
-mcp = FastMCP("Outlook Mailer")
+mcp = FastMCP("Outlook Mailer", lifespan=_lifespan)
 
 _logger = logging.getLogger("mcp_outlook.server")
 
 
-def _build_sendmail_url(sender: Optional[str]) -> str:
+def _build_mailbox_url(sender: Optional[str]) -> str:
     from urllib.parse import quote
 
     if sender:
         encoded = quote(sender)
-        return f"https://graph.microsoft.com/v1.0/users/{encoded}/sendMail"
-    return "https://graph.microsoft.com/v1.0/me/sendMail"
+        return f"https://graph.microsoft.com/v1.0/users/{encoded}"
+    return "https://graph.microsoft.com/v1.0/me"
+
+
+def _build_sendmail_url(sender: Optional[str]) -> str:
+    return f"{_build_mailbox_url(sender)}/sendMail"
 
 
 def _make_mail_request(
@@ -58,6 +106,7 @@ def _make_mail_request(
     return SendMailRequest.model_validate(payload)
 
 
+@profiled
 def send_outlook_mail_impl(
     subject: str,
     body: str,
@@ -73,12 +122,14 @@ def send_outlook_mail_impl(
     client_id: Optional[str] = None,
     client_secret: Optional[str] = None,
     access_token: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
 ) -> str:
     _logger.info(
-        "Preparing sendMail request: subject=%s, to_count=%d, dry_run=%s",
-        subject,
+        "Preparing sendMail request: to_count=%d, dry_run=%s",
         len(to),
         dry_run,
+        extra={"event": "send.prepare", "subject": subject},
     )
     try:
         mail_request = _make_mail_request(
@@ -99,47 +150,211 @@ def send_outlook_mail_impl(
 
     try:
         settings = get_graph_settings()
+        server_settings = get_server_settings()
     except ConfigurationError as exc:
         _logger.error("Configuration error: %s", exc)
         raise RuntimeError(f"Configuration error: {exc}") from exc
 
-    graph_payload = mail_request.to_graph_payload(settings.default_sender)
+    inline_report = extract_inline_images(mail_request, get_inline_image_cache())
+    if inline_report.unique_images:
+        _logger.info(
+            "Extracted inline images: references=%d, unique=%d, bytes_saved=%d",
+            inline_report.references,
+            inline_report.unique_images,
+            inline_report.bytes_saved,
+            extra={"event": "send.inline_images"},
+        )
+
     resolved_sender = mail_request.resolve_sender(settings.default_sender)
 
     if mail_request.dry_run:
+        graph_payload = mail_request.to_graph_payload(settings.default_sender)
         preview = json.dumps(graph_payload, indent=2, sort_keys=True)
         _logger.info(
-            "Dry run prepared for subject=%s, to_count=%d",
-            mail_request.subject,
+            "Dry run prepared: to_count=%d",
             len(mail_request.to),
+            extra={"event": "send.dry_run", "subject": mail_request.subject},
         )
-        return f"[DRY RUN] Payload ready for {resolved_sender or 'me'}:\n{preview}"
+        note = _describe_inline_images(inline_report)
+        return f"[DRY RUN] Payload ready for {resolved_sender or 'me'}:{note}\n{preview}"
+
+    store = get_state_store()
+    mailbox = (resolved_sender or "me").casefold()
+    if deadline is None:
+        deadline = Deadline(server_settings.send_timeout)
 
     # Create per-request token manager with user-provided credentials
     # Priority: parameters > environment variables
+    # Token acquisition may use at most half of the remaining budget so that
+    # sendMail always keeps time of its own.
     token_manager = GraphTokenManager(
         settings=settings,
         tenant_id=tenant_id,
         client_id=client_id,
         client_secret=client_secret,
         access_token=access_token,
+        http_timeout=deadline.timeout(15.0, "token acquisition", share=0.5),
+        client=get_http_client(),
+        store=store,
+    )
+    # Every delegated caller's mailbox is "me", so records shared through the
+    # store are scoped by who is calling as well as by mailbox.
+    scope = f"{token_manager.caller_identity()}:{mailbox}"
+
+    idem_key = f"{scope}:{idempotency_key}" if idempotency_key else None
+    if idem_key:
+        # The claim only has to outlive this attempt; the long retention
+        # applies once the result is recorded.
+        remaining = deadline.remaining()
+        pending_ttl = (server_settings.send_timeout if remaining is None else remaining) + 30.0
+        existing = store.claim_idempotency(idem_key, pending_ttl)
+        if existing is not None:
+            status, result = existing
+            if status == "done" and result is not None:
+                _logger.info("Returning recorded result for idempotency_key=%s", idempotency_key)
+                return result
+            raise RuntimeError(
+                f"A send with idempotency_key={idempotency_key!r} is already in progress."
+            )
+
+    try:
+        with deadline.bind():
+            result = _deliver(
+                mail_request,
+                resolved_sender,
+                mailbox,
+                scope,
+                token_manager,
+                settings=settings,
+                server_settings=server_settings,
+                store=store,
+                deadline=deadline,
+                tenant_id=tenant_id,
+                access_token=access_token,
+            )
+    except SendAbortedError as exc:
+        _logger.warning("Send aborted: %s", exc)
+        if idem_key:
+            store.release_idempotency(idem_key)
+        raise
+    except BaseException:
+        if idem_key:
+            store.release_idempotency(idem_key)
+        raise
+
+    result += _describe_inline_images(inline_report)
+    if idem_key:
+        store.complete_idempotency(idem_key, result, server_settings.idempotency_ttl)
+    return result
+
+
+def _describe_inline_images(report: InlineImageReport) -> str:
+    if not report.unique_images:
+        return ""
+    # A single-use image costs slightly more as an attachment than as a data
+    # URI, so the net change can be growth.
+    if report.bytes_saved >= 0:
+        change = f"saving {report.bytes_saved} bytes"
+    else:
+        change = f"adding {-report.bytes_saved} bytes of attachment overhead"
+    return (
+        f" Extracted {report.unique_images} inline image(s) from "
+        f"{report.references} reference(s), {change}."
     )
+
+
+def _deliver(
+    mail_request: SendMailRequest,
+    resolved_sender: Optional[str],
+    mailbox: str,
+    scope: str,
+    token_manager: GraphTokenManager,
+    *,
+    settings: GraphSettings,
+    server_settings: ServerSettings,
+    store: StateStore,
+    deadline: Deadline,
+    tenant_id: Optional[str],
+    access_token: Optional[str],
+) -> str:
+    if server_settings.mailbox_rate_per_minute:
+        per_minute = server_settings.mailbox_rate_per_minute
+        retry_after = store.consume(
+            f"mailbox:{scope}",
+            rate=per_minute / 60.0,
+            capacity=max(1.0, per_minute),
+        )
+        if retry_after > 0:
+            _logger.warning(
+                "Mailbox rate limit reached",
+                extra={"event": "send.rate_limited", "mailbox": mailbox},
+            )
+            raise RuntimeError(
+                f"Send rate limit reached for {resolved_sender or 'me'}; "
+                f"retry after {retry_after:.1f}s."
+            )
+
     try:
         token = token_manager.get_token()
     except GraphAuthError as exc:
+        deadline.check("token acquisition")
         _logger.error("Failed to acquire access token: %s", exc)
         raise RuntimeError(f"Failed to acquire Graph access token: {exc}") from exc
 
-    url = _build_sendmail_url(resolved_sender)
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
+    attachment_bytes = mail_request.attachment_payload_size()
+    strategy = choose_send_strategy(
+        attachment_bytes,
+        mail_request.save_to_sent_items,
+        server_settings.draft_threshold_bytes,
+    )
+    _logger.info("Sending via %s strategy", strategy, extra={"event": "send.strategy"})
+    if strategy == "draft":
+        # The send budget is sized for one sendMail call; a multi-megabyte
+        # upload needs time in proportion to its size.
+        deadline.extend(draft_time_allowance(attachment_bytes))
+
+    # Delegated callers all send as "me" and may not name a tenant, so both
+    # limiters are scoped by who is calling; otherwise one user's throttling
+    # would slow every delegated user down.
+    tenant = tenant_id or (None if access_token else settings.tenant_id)
+    try:
+        permit = get_concurrency_controller().acquire(
+            tenant or token_manager.caller_identity(), scope, timeout=deadline.remaining()
+        )
+    except ConcurrencyLimitError as exc:
+        deadline.check("waiting for a send slot")
+        _logger.warning("Send concurrency limit reached: %s", exc)
+        raise RuntimeError(str(exc)) from exc
 
+    # Only a Graph answer says anything about capacity: "ok" for success,
+    # "throttled" for 429/503. Anything else leaves the limits untouched.
+    outcome: Optional[str] = None
     try:
-        response = httpx.post(url, headers=headers, json=graph_payload, timeout=20.0)
-        response.raise_for_status()
+        if strategy == "draft":
+            DraftSender(
+                get_http_client(),
+                token,
+                _build_mailbox_url(resolved_sender),
+                max_concurrency=server_settings.attachment_concurrency,
+                deadline=deadline,
+            ).send(mail_request.to_graph_payload(settings.default_sender))
+        else:
+            url = _build_sendmail_url(resolved_sender)
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            }
+            response = get_http_client().post(
+                url,
+                headers=headers,
+                content=mail_request.to_graph_json(settings.default_sender),
+                timeout=deadline.timeout(20.0, "sendMail"),
+            )
+            response.raise_for_status()
+        outcome = "ok"
     except httpx.HTTPStatusError as exc:
+        if exc.response.status_code in THROTTLE_STATUS:
+            outcome = "throttled"
         detail = exc.response.text
         friendly = detail
         try:
@@ -155,18 +370,30 @@ def send_outlook_mail_impl(
             "Graph sendMail HTTP error: status=%s detail=%s",
             exc.response.status_code,
             detail,
+            extra={"event": "send.http_error", "subject": mail_request.subject},
         )
         raise RuntimeError(
             f"Microsoft Graph sendMail failed ({exc.response.status_code}): {friendly}"
         ) from exc
     except httpx.HTTPError as exc:
+        # An aborted or timed-out request surfaces as a transport error;
+        # report cancellation and deadline expiry distinctly.
+        deadline.check("sendMail")
         _logger.error("Network error calling Microsoft Graph: %s", exc)
         raise RuntimeError(f"Network error calling Microsoft Graph: {exc}") from exc
+    finally:
+        # Whole draft pipelines are far slower than one sendMail call, so
+        # only inline sends feed the latency baseline.
+        permit.release(
+            throttled=outcome == "throttled",
+            record_latency=strategy == "inline",
+            completed=outcome is not None,
+        )
 
     _logger.info(
-        "Microsoft Graph accepted message: subject=%s, to_count=%d",
-        mail_request.subject,
+        "Microsoft Graph accepted message: to_count=%d",
         len(mail_request.to),
+        extra={"event": "send.accepted", "subject": mail_request.subject},
     )
     return (
         "Microsoft Graph accepted the message "
@@ -175,7 +402,7 @@ def send_outlook_mail_impl(
 
 
 @mcp.tool
-def send_outlook_mail(
+async def send_outlook_mail(
     subject: str,
     body: str,
     to: Sequence[str],
@@ -190,6 +417,8 @@ def send_outlook_mail(
     client_id: Optional[str] = None,
     client_secret: Optional[str] = None,
     access_token: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    timeout_seconds: Optional[float] = None,
 ) -> str:
     """
     Send email via Microsoft Graph API.
@@ -215,6 +444,11 @@ def send_outlook_mail(
         client_id: App registration client ID (for client credentials flow)
         client_secret: Client secret (for client credentials flow)
         access_token: Delegated access token (alternative to client credentials)
+        idempotency_key: Optional key; repeating a completed send with the same
+            key and sender returns the original result instead of resending
+        timeout_seconds: Total time budget for token acquisition and sending
+            (default: MCP_OUTLOOK_SEND_TIMEOUT, 35s); messages with large
+            attachments get extra time in proportion to their size
 
     Returns:
         Success message or dry-run preview
@@ -222,8 +456,12 @@ def send_outlook_mail(
     Raises:
         ValueError: Invalid email payload
         RuntimeError: Configuration, authentication, or API errors
+        SendCancelledError: The call was cancelled while in progress
+        DeadlineExceededError: The time budget ran out
     """
-    return send_outlook_mail_impl(
+    deadline = Deadline(timeout_seconds or get_server_settings().send_timeout)
+    call = partial(
+        send_outlook_mail_impl,
         subject=subject,
         body=body,
         to=to,
@@ -238,8 +476,291 @@ def send_outlook_mail(
         client_id=client_id,
         client_secret=client_secret,
         access_token=access_token,
+        idempotency_key=idempotency_key,
+        deadline=deadline,
+    )
+    # The send runs in a worker thread. If the client cancels the call, stop
+    # waiting for it at once and abort its in-flight HTTP requests, which
+    # also frees their pooled connections.
+    try:
+        return await anyio.to_thread.run_sync(call, abandon_on_cancel=True)
+    except anyio.get_cancelled_exc_class():
+        deadline.cancel()
+        raise
+
+
+def _dispatch_scheduled(schedule_id: str, payload: dict, credentials: dict) -> str:
+    # The idempotency key makes a re-claimed send (after a crash between the
+    # Graph call and recording its result) return the recorded outcome.
+    return send_outlook_mail_impl(
+        **payload,
+        **credentials,
+        idempotency_key=f"schedule:{schedule_id}",
+    )
+
+
+@lru_cache(maxsize=1)
+def get_mail_scheduler() -> MailScheduler:
+    """Return the process-wide scheduler, starting its timer thread on first use."""
+    server_settings = get_server_settings()
+    scheduler = MailScheduler(
+        get_state_store(),
+        _dispatch_scheduled,
+        batch_size=server_settings.schedule_batch_size,
+        batch_interval=server_settings.schedule_batch_interval,
+        result_ttl=server_settings.idempotency_ttl,
+    )
+    scheduler.start()
+    return scheduler
+
+
+@mcp.tool
+def schedule_outlook_mail(
+    send_at: str,
+    subject: str,
+    body: str,
+    to: Sequence[str],
+    timezone: Optional[str] = None,
+    cc: Optional[Sequence[str]] = None,
+    bcc: Optional[Sequence[str]] = None,
+    body_type: Union[EmailBodyType, str] = EmailBodyType.TEXT,
+    attachments: Optional[Sequence[Union[FileAttachment, dict]]] = None,
+    save_to_sent_items: bool = True,
+    sender: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+    client_id: Optional[str] = None,
+    client_secret: Optional[str] = None,
+    access_token: Optional[str] = None,
+) -> str:
+    """
+    Schedule an email to be sent via Microsoft Graph at a later time.
+
+    The message is validated now and handed to the regular send path when it
+    falls due. Credentials are kept in server memory only; if the server
+    restarts before the send time, a send scheduled with credentials is
+    marked failed and must be scheduled again. Sends scheduled without
+    credentials use the server's environment credentials.
+
+    Args:
+        send_at: ISO 8601 send time, e.g. "2026-03-02T09:00:00" or with an offset
+        timezone: IANA time zone for send_at without an offset, e.g. "America/New_York"
+            (default: UTC)
+        subject: Email subject line
+        body: Email body content
+        to: List of recipient email addresses
+        cc: Optional list of CC recipients
+        bcc: Optional list of BCC recipients
+        body_type: Email body format (TEXT or HTML)
+        attachments: Optional list of file attachments
+        save_to_sent_items: Save to sent items folder (default: True)
+        sender: Optional sender email override
+        tenant_id: Microsoft Entra tenant ID (for client credentials flow)
+        client_id: App registration client ID (for client credentials flow)
+        client_secret: Client secret (for client credentials flow)
+        access_token: Delegated access token (alternative to client credentials)
+
+    Returns:
+        Confirmation including the schedule id
+
+    Raises:
+        ValueError: Invalid email payload or send time
+        RuntimeError: The server has no persistent state store
+    """
+    if not get_state_store().is_shared:
+        raise RuntimeError(
+            "Scheduled sends need a persistent state store; set MCP_OUTLOOK_STATE_PATH "
+            "to a file instead of ':memory:'."
+        )
+    due = parse_send_at(send_at, timezone)
+    try:
+        mail_request = _make_mail_request(
+            subject=subject,
+            body=body,
+            to=to,
+            cc=cc,
+            bcc=bcc,
+            body_type=body_type,
+            attachments=attachments,
+            save_to_sent_items=save_to_sent_items,
+            sender=sender,
+        )
+    except ValueError as exc:
+        raise ValueError(f"Invalid email payload: {exc}") from exc
+
+    payload = {
+        "subject": mail_request.subject,
+        "body": mail_request.body.content,
+        "body_type": mail_request.body.content_type.value,
+        "to": mail_request.to.addresses,
+        "cc": mail_request.cc.addresses,
+        "bcc": mail_request.bcc.addresses,
+        "attachments": [attachment.model_dump() for attachment in mail_request.attachments],
+        "save_to_sent_items": mail_request.save_to_sent_items,
+        "sender": mail_request.sender_override,
+    }
+    credentials = {
+        key: value
+        for key, value in {
+            "tenant_id": tenant_id,
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "access_token": access_token,
+        }.items()
+        if value
+    }
+    schedule_id = get_mail_scheduler().schedule(due, payload, credentials)
+    _logger.info("Scheduled send %s for %s", schedule_id, send_at)
+    return f"Scheduled message {schedule_id} for {send_at}{f' ({timezone})' if timezone else ''}."
+
+
+@mcp.tool
+def cancel_scheduled_outlook_mail(schedule_id: str) -> str:
+    """
+    Cancel a scheduled email that has not been sent yet.
+
+    Args:
+        schedule_id: Id returned by schedule_outlook_mail
+
+    Returns:
+        Whether the send was cancelled
+    """
+    if get_mail_scheduler().cancel(schedule_id):
+        return f"Cancelled scheduled message {schedule_id}."
+    return f"Scheduled message {schedule_id} was not pending (already sent, cancelled, or unknown)."
+
+
+@mcp.tool
+def get_scheduled_outlook_mail(schedule_id: str) -> str:
+    """
+    Report the status of a scheduled email.
+
+    Args:
+        schedule_id: Id returned by schedule_outlook_mail
+
+    Returns:
+        Status (pending, sending, sent, failed, cancelled) and any result
+    """
+    record = get_state_store().get_scheduled(schedule_id)
+    if record is None:
+        return f"No scheduled message {schedule_id}."
+    due, status, result = record
+    due_text = datetime.fromtimestamp(due, dt_timezone.utc).isoformat()
+    summary = f"Scheduled message {schedule_id} (due {due_text}): {status}"
+    return f"{summary} - {result}" if result else summary
+
+
+def start_send_profile(
+    calls: Optional[int] = None,
+    seconds: Optional[float] = None,
+    mode: str = "cprofile",
+) -> str:
+    """
+    Profile the next send calls in this worker process.
+
+    Args:
+        calls: Number of send calls to capture
+        seconds: Length of the capture window in seconds
+        mode: "cprofile" for a .pstats file, "sample" for collapsed .folded stacks
+
+    Returns:
+        Confirmation including the output directory
+    """
+    profiler = get_send_profiler()
+    profiler.start(calls=calls, seconds=seconds, mode=mode)
+    return (
+        f"Profiling armed (mode={mode}, calls={calls}, seconds={seconds}); "
+        f"output goes to {get_server_settings().profile_dir}."
+    )
+
+
+def stop_send_profile() -> str:
+    """
+    Stop the current profile capture and write it to disk.
+
+    Returns:
+        The path of the written profile, if any calls were captured
+    """
+    profiler = get_send_profiler()
+    if not profiler.armed:
+        return "No profile capture is running."
+    path = profiler.stop()
+    if path is None:
+        return "No send calls were captured."
+    return f"Profile written to {path}."
+
+
+def get_send_concurrency() -> dict:
+    """
+    Report adaptive send concurrency limits for this worker process.
+
+    Returns:
+        Per-tenant and per-mailbox limit, in-flight count, throttle count,
+        and the controller's last decision
+    """
+    return get_concurrency_controller().snapshot()
+
+
+async def _metrics(request):
+    from starlette.responses import PlainTextResponse
+
+    return PlainTextResponse(get_concurrency_controller().render_prometheus())
+
+
+if get_server_settings().admin_tools:
+    mcp.tool(start_send_profile)
+    mcp.tool(stop_send_profile)
+    mcp.tool(get_send_concurrency)
+    mcp.custom_route("/metrics", methods=["GET"])(_metrics)
+
+
+def create_http_app():
+    """
+    Build the streamable-HTTP ASGI app served by each worker process.
+
+    The app is stateless so any worker can answer any request; state that must
+    survive across workers lives in the shared ``StateStore``.
+    """
+    return mcp.http_app(
+        transport="streamable-http",
+        stateless_http=True,
+        json_response=True,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    server_settings = get_server_settings()
+    parser = argparse.ArgumentParser(description="Outlook Mailer MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=("stdio", "http"),
+        default=server_settings.transport,
+    )
+    parser.add_argument("--host", default=server_settings.host)
+    parser.add_argument("--port", type=int, default=server_settings.port)
+    parser.add_argument("--workers", type=int, default=server_settings.workers)
+    args = parser.parse_args(argv)
+
+    if args.transport == "stdio":
+        mcp.run()
+        return
+
+    import uvicorn
+
+    if args.workers <= 1:
+        uvicorn.run(create_http_app(), host=args.host, port=args.port)
+        return
+
+    if server_settings.state_path == ":memory:":
+        parser.error("MCP_OUTLOOK_STATE_PATH=:memory: cannot be shared between workers.")
+
+    uvicorn.run(
+        "server:create_http_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
     )
 
 
 if __name__ == "__main__":
-    mcp.run()
+    main()
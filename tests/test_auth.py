@@ -1,3 +1,6 @@
+import base64
+import json
+
 import pytest
 import httpx
 
@@ -60,3 +63,17 @@ def test_missing_client_credentials_config_raises():
 
     with pytest.raises(GraphAuthError):
         manager.get_token()
+
+
+def test_caller_identity_does_not_trust_token_claims():
+    claims = base64.urlsafe_b64encode(
+        json.dumps({"tid": "tenant", "oid": "user-1"}).encode()
+    ).decode().rstrip("=")
+
+    genuine = GraphTokenManager(access_token=f"header.{claims}.signature").caller_identity()
+    forged = GraphTokenManager(access_token=f"header.{claims}.forged").caller_identity()
+    opaque = GraphTokenManager(access_token="EwB-opaque-token").caller_identity()
+
+    assert genuine != forged
+    assert "user-1" not in genuine
+    assert opaque.startswith("delegated:") and "EwB" not in opaque
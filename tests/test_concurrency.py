@@ -0,0 +1,142 @@
+import threading
+import time
+
+import httpx
+
+from mcp_outlook.concurrency import (
+    THROTTLE_STATUS,
+    AIMDLimiter,
+    ConcurrencyController,
+    ConcurrencyLimitError,
+)
+
+
+class ThrottlingGraph:
+    """Mock Graph that answers 429 whenever more than ``capacity`` sends overlap."""
+
+    def __init__(self, capacity: int, latency: float = 0.005):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            over = self.in_flight > self.capacity
+        try:
+            time.sleep(self.latency)
+            if over:
+                return httpx.Response(429, headers={"Retry-After": "1"})
+            return httpx.Response(202)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def _drive(controller, client, sends: int, threads: int) -> int:
+    throttled = {"count": 0}
+    lock = threading.Lock()
+    remaining = iter(range(sends))
+
+    def worker():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            permit = controller.acquire("tenant", "mailbox")
+            response = client.post("https://graph.microsoft.com/v1.0/me/sendMail")
+            is_throttled = response.status_code in THROTTLE_STATUS
+            if is_throttled:
+                with lock:
+                    throttled["count"] += 1
+            permit.release(throttled=is_throttled)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return throttled["count"]
+
+
+def test_limit_grows_when_healthy():
+    limiter = AIMDLimiter("mailbox", initial=2, maximum=10)
+    for _ in range(20):
+        started = limiter.acquire()
+        limiter.release(started, throttled=False, latency=0.01)
+
+    assert limiter.limit > 4
+    assert limiter.snapshot()["last_decision"] == "increase"
+
+
+def test_one_window_of_throttles_backs_off_once():
+    limiter = AIMDLimiter("mailbox", initial=8)
+    starts = [limiter.acquire() for _ in range(4)]
+    for started in starts:
+        limiter.release(started, throttled=True)
+
+    assert limiter.limit == 4
+    assert limiter.snapshot()["throttled"] == 4
+
+
+def test_controller_converges_under_mock_graph_throttling():
+    client = httpx.Client(transport=httpx.MockTransport(ThrottlingGraph(capacity=3)))
+
+    static = ConcurrencyController(initial=16, maximum=16, decrease=1.0)
+    static_throttled = _drive(static, client, sends=400, threads=16)
+
+    adaptive = ConcurrencyController(initial=1, maximum=32, latency_tolerance=100)
+    adaptive_throttled = _drive(adaptive, client, sends=400, threads=16)
+
+    limit = adaptive.snapshot()["mailbox:mailbox"]["limit"]
+    assert 1 <= limit <= 8
+    assert adaptive_throttled < static_throttled / 2
+    assert "mcp_outlook_send_concurrency_limit" in adaptive.render_prometheus()
+
+    client.close()
+
+
+def test_acquire_times_out_when_saturated():
+    controller = ConcurrencyController(initial=1, wait_timeout=0.05)
+    held = controller.acquire("tenant", "mailbox")
+
+    try:
+        controller.acquire("tenant", "mailbox")
+    except ConcurrencyLimitError:
+        pass
+    else:
+        raise AssertionError("Expected ConcurrencyLimitError")
+
+    held.release()
+    controller.acquire("tenant", "mailbox").release()
+    assert controller.snapshot()["tenant:tenant"]["in_flight"] == 0
+
+
+def test_idle_limiters_are_evicted():
+    now = {"t": 0.0}
+    controller = ConcurrencyController(idle_timeout=100, clock=lambda: now["t"])
+    held = controller.acquire("tenant", "busy")
+    controller.acquire("tenant", "idle").release()
+
+    now["t"] = 150.0
+    controller.acquire("tenant", "other").release()
+
+    assert set(controller.snapshot()) == {"tenant:tenant", "mailbox:busy", "mailbox:other"}
+    held.release()
+
+
+def test_metrics_do_not_expose_addresses():
+    controller = ConcurrencyController()
+    controller.acquire('delegated:"bob"@example.com', "bob@example.com").release()
+
+    metrics = controller.render_prometheus()
+
+    assert "bob" not in metrics
+    assert 'key="mailbox:' in metrics
+    assert 'key="tenant:' in metrics
+    assert 'decision="increase"} 1' in metrics
+    assert 'decision="decrease"} 0' in metrics
+    assert "mcp_outlook_send_last_decision{" in metrics
@@ -0,0 +1,180 @@
+from contextlib import ExitStack
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+
+from mcp_outlook.deadline import (
+    Deadline,
+    DeadlineExceededError,
+    SendCancelledError,
+)
+from mcp_outlook.http_client import AbortableHTTPTransport
+
+
+@pytest.fixture
+def silent_server():
+    """A TCP server that accepts connections and never answers."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    accepted = []
+    stop = threading.Event()
+
+    def accept():
+        listener.settimeout(0.05)
+        while not stop.is_set():
+            try:
+                accepted.append(listener.accept()[0])
+            except OSError:
+                continue
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{listener.getsockname()[1]}/sendMail"
+    stop.set()
+    thread.join()
+    for conn in accepted:
+        conn.close()
+    listener.close()
+
+
+def test_timeout_is_capped_by_remaining_budget():
+    now = {"t": 0.0}
+    deadline = Deadline(10.0, clock=lambda: now["t"])
+
+    assert deadline.timeout(15.0, "token", share=0.5) == 5.0
+    now["t"] = 8.0
+    assert deadline.timeout(20.0, "sendMail") == 2.0
+    now["t"] = 10.0
+    with pytest.raises(DeadlineExceededError):
+        deadline.timeout(20.0, "sendMail")
+
+
+def test_cancel_aborts_in_flight_request_and_drops_connection(silent_server):
+    transport = AbortableHTTPTransport()
+    client = httpx.Client(transport=transport)
+    deadline = Deadline(30.0)
+    outcome = {}
+
+    def send():
+        with deadline.bind():
+            started = time.monotonic()
+            try:
+                client.post(silent_server, json={}, timeout=deadline.timeout(20.0, "sendMail"))
+            except httpx.HTTPError:
+                try:
+                    deadline.check("sendMail")
+                except SendCancelledError as exc:
+                    outcome["error"] = exc
+            outcome["elapsed"] = time.monotonic() - started
+
+    thread = threading.Thread(target=send)
+    thread.start()
+    time.sleep(0.2)
+    deadline.cancel()
+    thread.join(5)
+
+    assert isinstance(outcome["error"], SendCancelledError)
+    assert outcome["elapsed"] < 2
+    assert transport._pool.connections == []
+
+    client.close()
+
+
+def test_cancel_does_not_affect_other_threads(silent_server):
+    client = httpx.Client(transport=AbortableHTTPTransport())
+    cancelled = Deadline()
+    cancelled.cancel()
+
+    with cancelled.bind():
+        with pytest.raises(httpx.HTTPError):
+            client.post(silent_server, json={}, timeout=5.0)
+
+    started = time.monotonic()
+    with pytest.raises(httpx.ReadTimeout):
+        client.post(silent_server, json={}, timeout=0.2)
+    assert time.monotonic() - started >= 0.2
+
+    client.close()
+
+
+def test_deadline_expiry_is_reported_distinctly(silent_server):
+    client = httpx.Client(transport=AbortableHTTPTransport())
+    deadline = Deadline(0.2)
+
+    with deadline.bind():
+        with pytest.raises(httpx.ReadTimeout):
+            client.post(silent_server, json={}, timeout=deadline.timeout(20.0, "sendMail"))
+    with pytest.raises(DeadlineExceededError):
+        deadline.check("sendMail")
+
+    client.close()
+
+
+def test_budget_bounds_a_response_that_keeps_trickling():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    stop = threading.Event()
+
+    def trickle():
+        conn = listener.accept()[0]
+        conn.recv(65536)
+        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 100000\r\n\r\n")
+        # Each read finishes well inside its timeout; only the total is slow.
+        while not stop.wait(0.05):
+            try:
+                conn.sendall(b"x")
+            except OSError:
+                break
+        conn.close()
+
+    thread = threading.Thread(target=trickle, daemon=True)
+    thread.start()
+    client = httpx.Client(transport=AbortableHTTPTransport())
+    deadline = Deadline(0.5)
+
+    started = time.monotonic()
+    with deadline.bind():
+        with pytest.raises(httpx.HTTPError):
+            client.get(
+                f"http://127.0.0.1:{listener.getsockname()[1]}/",
+                timeout=deadline.timeout(20.0, "sendMail"),
+            )
+    assert time.monotonic() - started < 2
+    with pytest.raises(DeadlineExceededError):
+        deadline.check("sendMail")
+
+    # The timer's abort does not outlive the bind on this thread.
+    with pytest.raises(httpx.ReadTimeout):
+        client.get(f"http://127.0.0.1:{listener.getsockname()[1]}/", timeout=0.1)
+
+    stop.set()
+    thread.join(2)
+    client.close()
+    listener.close()
+
+
+def test_extend_moves_the_watchdog(silent_server):
+    client = httpx.Client(transport=AbortableHTTPTransport())
+    deadline = Deadline(0.1)
+    deadline.extend(0.6)
+
+    started = time.monotonic()
+    with deadline.bind():
+        with pytest.raises(httpx.ReadTimeout):
+            client.post(silent_server, json={}, timeout=deadline.timeout(20.0, "upload"))
+    assert time.monotonic() - started >= 0.6
+
+    client.close()
+
+
+def test_bind_does_not_start_a_thread_per_send():
+    before = threading.active_count()
+    with ExitStack() as stack:
+        for _ in range(20):
+            stack.enter_context(Deadline(5.0).bind())
+        assert threading.active_count() <= before + 1
@@ -0,0 +1,213 @@
+import base64
+import json
+import logging
+import threading
+
+import httpx
+import pytest
+
+from mcp_outlook.drafts import DraftSender, choose_send_strategy
+from mcp_outlook.email import parse_send_mail_request
+
+MAILBOX = "https://graph.microsoft.com/v1.0/users/sender%40example.com"
+
+
+def _attachment(name: str, size: int) -> dict:
+    return {
+        "@odata.type": "#microsoft.graph.fileAttachment",
+        "name": name,
+        "contentType": "application/octet-stream",
+        "contentBytes": base64.b64encode(b"x" * size).decode("ascii"),
+    }
+
+
+def _payload(*attachments: dict) -> dict:
+    return {
+        "message": {
+            "subject": "Report",
+            "body": {"contentType": "Text", "content": "See attached."},
+            "toRecipients": [{"emailAddress": {"address": "user@example.com"}}],
+            "attachments": list(attachments),
+        },
+        "saveToSentItems": True,
+    }
+
+
+class FakeGraph:
+    def __init__(self, fail_once=(), fail_always=()):
+        self.calls = []
+        self.fail_once = set(fail_once)
+        self.fail_always = set(fail_always)
+        self.uploaded = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        with self.lock:
+            self.calls.append((request.method, path, request))
+        if request.method == "POST" and path.endswith("/messages"):
+            return httpx.Response(201, json={"id": "draft1"})
+        if path.endswith("/attachments/createUploadSession"):
+            return httpx.Response(200, json={"uploadUrl": "https://upload.example.com/session"})
+        if request.url.host == "upload.example.com":
+            with self.lock:
+                self.uploaded += len(request.content)
+            return httpx.Response(200)
+        if path.endswith("/attachments"):
+            name = json.loads(request.content)["name"]
+            if name in self.fail_always:
+                return httpx.Response(503)
+            with self.lock:
+                if name in self.fail_once:
+                    self.fail_once.discard(name)
+                    return httpx.Response(503, headers={"Retry-After": "0"})
+            return httpx.Response(201, json={"name": name})
+        if path.endswith("/send"):
+            return httpx.Response(202)
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        raise AssertionError(f"Unexpected request {request.method} {request.url}")
+
+
+def test_choose_send_strategy_uses_payload_size():
+    def size(raw: int) -> int:
+        request = parse_send_mail_request(
+            {
+                "subject": "Report",
+                "body": {"content": "See attached.", "content_type": "Text"},
+                "to": ["user@example.com"],
+                "attachments": [
+                    {"name": "a", "content_bytes": _attachment("a", raw)["contentBytes"]}
+                ],
+            }
+        )
+        return request.attachment_payload_size()
+
+    small = size(10)
+    large = size(2048)
+    assert choose_send_strategy(small, threshold=1024) == "inline"
+    assert choose_send_strategy(large, threshold=1024) == "draft"
+    assert choose_send_strategy(large, save_to_sent_items=False, threshold=1024) == "inline"
+
+
+def test_draft_send_uploads_attachments_and_retries_failed_part():
+    graph = FakeGraph(fail_once={"b.bin"})
+    client = httpx.Client(transport=httpx.MockTransport(graph))
+    sender = DraftSender(
+        client,
+        "token",
+        MAILBOX,
+        inline_limit=1000,
+        chunk_size=512,
+        sleep=lambda _: None,
+    )
+
+    message_id = sender.send(
+        _payload(_attachment("a.bin", 100), _attachment("b.bin", 200), _attachment("big.bin", 1500))
+    )
+
+    assert message_id == "draft1"
+    methods = [(method, path.rsplit("/", 1)[-1]) for method, path, _ in graph.calls]
+    assert methods[0] == ("POST", "messages")
+    assert methods[-1] == ("POST", "send")
+    assert methods.count(("POST", "attachments")) == 3  # b.bin retried once
+    assert graph.uploaded == 1500
+
+    created = graph.calls[0][2]
+    assert b"attachments" not in created.content
+    for method, _, request in graph.calls:
+        if request.url.host == "upload.example.com":
+            assert "Authorization" not in request.headers
+            assert request.headers["Content-Range"].startswith("bytes ")
+
+    client.close()
+
+
+def test_draft_is_deleted_when_attachment_keeps_failing():
+    graph = FakeGraph(fail_always={"a.bin"})
+    client = httpx.Client(transport=httpx.MockTransport(graph))
+    sender = DraftSender(client, "token", MAILBOX, max_attempts=2, sleep=lambda _: None)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        sender.send(_payload(_attachment("a.bin", 10)))
+
+    methods = [method for method, _, _ in graph.calls]
+    assert methods[-1] == "DELETE"
+    assert not any(path.endswith("/send") for _, path, _ in graph.calls)
+
+    client.close()
+
+
+def test_draft_creation_and_send_are_not_retried():
+    calls = []
+
+    def graph(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path.rsplit("/", 1)[-1]))
+        if request.url.path.endswith("/messages"):
+            return httpx.Response(201, json={"id": "draft1"})
+        if request.url.path.endswith("/send"):
+            return httpx.Response(503)
+        return httpx.Response(201, json={})
+
+    client = httpx.Client(transport=httpx.MockTransport(graph))
+    sender = DraftSender(client, "token", MAILBOX, sleep=lambda _: None)
+    with pytest.raises(httpx.HTTPStatusError):
+        sender.send(_payload(_attachment("a.bin", 10)))
+    # The send may have gone through, so the draft is not deleted.
+    assert calls == [("POST", "messages"), ("POST", "attachments"), ("POST", "send")]
+
+    calls.clear()
+    failing = httpx.Client(
+        transport=httpx.MockTransport(lambda request: calls.append(request) or httpx.Response(503))
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        DraftSender(failing, "token", MAILBOX, sleep=lambda _: None).send(_payload())
+    assert len(calls) == 1
+
+    client.close()
+    failing.close()
+
+
+def test_retry_log_omits_upload_session_token(caplog):
+    attempts = []
+
+    def graph(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/messages"):
+            return httpx.Response(201, json={"id": "draft1"})
+        if request.url.path.endswith("/createUploadSession"):
+            return httpx.Response(
+                200, json={"uploadUrl": "https://upload.example.com/session?authtoken=secret"}
+            )
+        if request.url.host == "upload.example.com":
+            attempts.append(request)
+            return httpx.Response(503 if len(attempts) == 1 else 200)
+        return httpx.Response(202)
+
+    client = httpx.Client(transport=httpx.MockTransport(graph))
+    sender = DraftSender(client, "token", MAILBOX, inline_limit=10, sleep=lambda _: None)
+    with caplog.at_level(logging.WARNING, logger="mcp_outlook.drafts"):
+        sender.send(_payload(_attachment("big.bin", 100)))
+
+    assert len(attempts) == 2
+    assert "https://upload.example.com/session" in caplog.text
+    assert "secret" not in caplog.text
+
+    client.close()
+
+
+def test_large_inline_image_keeps_its_content_id_in_upload_session():
+    graph = FakeGraph()
+    client = httpx.Client(transport=httpx.MockTransport(graph))
+    image = {**_attachment("logo.png", 1500), "contentId": "logo", "isInline": True}
+    sender = DraftSender(client, "token", MAILBOX, inline_limit=1000, chunk_size=512)
+
+    sender.send(_payload(image))
+
+    session = next(
+        request for _, path, request in graph.calls if path.endswith("createUploadSession")
+    )
+    item = json.loads(session.content)["AttachmentItem"]
+    assert item["contentId"] == "logo"
+    assert item["isInline"] is True
+
+    client.close()
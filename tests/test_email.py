@@ -1,6 +1,14 @@
+import json
+
+import pytest
+from pydantic.networks import validate_email
+from pydantic_core import PydanticCustomError
+
 from mcp_outlook.email import (
     EmailBodyType,
+    RecipientList,
     SendMailRequest,
+    _plain_address,
     parse_send_mail_request,
 )
 
@@ -48,3 +56,81 @@ def test_parse_send_mail_request_validates_email_addresses():
         assert "value is not a valid email address" in str(exc)
     else:
         raise AssertionError("Expected ValueError for invalid email address")
+
+
+def test_recipient_list_dedupes_large_lists_in_order():
+    addresses = [f"user{i % 500}@example.com" for i in range(2000)]
+    addresses += [address.upper() for address in addresses[:10]]
+
+    recipients = RecipientList(addresses)
+
+    assert len(recipients) == 500
+    assert recipients.addresses[:2] == ["user0@example.com", "user1@example.com"]
+    assert "USER42@EXAMPLE.COM" in recipients
+    assert "other@example.com" not in recipients
+
+
+def test_to_graph_json_matches_graph_payload():
+    request = parse_send_mail_request(
+        {
+            "subject": 'Quarterly "update"',
+            "body": {"content": "<p>Hi</p>", "content_type": "HTML"},
+            "to": ["Team <team@example.com>"],
+            "cc": "cc@example.com",
+            "bcc": [f"member{i}@example.com" for i in range(50)],
+            "attachments": [{"name": "a.txt", "content_bytes": "aGk="}],
+            "save_to_sent_items": False,
+        }
+    )
+
+    payload = request.to_graph_payload("sender@example.com")
+    assert json.loads(request.to_graph_json("sender@example.com")) == payload
+    assert payload["message"]["toRecipients"] == [
+        {"emailAddress": {"address": "team@example.com"}}
+    ]
+    assert len(payload["message"]["bccRecipients"]) == 50
+
+
+def test_recipient_list_names_the_invalid_entry():
+    addresses = [f"user{i}@example.com" for i in range(100)]
+    addresses[42] = "not-an-email"
+
+    with pytest.raises(ValueError, match=r"Recipient 42 \('not-an-email'\): value is not a valid"):
+        RecipientList(addresses)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "Member.One+tag@Example.COM",
+        "o'brien@sub.example.io",
+        "a@b.c0m",
+        "a..b@example.com",
+        ".a@example.com",
+        "a@-b.com",
+        "a@ab--c.com",
+        "a@xn--bcher-kva.ch",
+        "a@host.local",
+        "a@example.test",
+        "a@example.123",
+        "x" * 65 + "@example.com",
+        "a@" + "b" * 64 + ".com",
+        "Bob <bob@example.com>",
+        "bücher@example.com",
+    ],
+)
+def test_plain_address_fast_path_matches_email_validator(value):
+    try:
+        expected = validate_email(value)[1]
+    except PydanticCustomError:
+        expected = None
+
+    fast = _plain_address(value)
+
+    # The fast path may defer to email-validator, but never disagrees with it.
+    assert fast is None or fast == expected
+    if expected is None:
+        with pytest.raises(ValueError):
+            RecipientList([value])
+    else:
+        assert RecipientList([value]).addresses == [expected]
@@ -0,0 +1,64 @@
+import base64
+
+from mcp_outlook.email import SendMailRequest
+from mcp_outlook.inline_images import InlineImageCache, extract_inline_images
+
+LOGO = base64.b64encode(b"\x89PNG logo" * 200).decode("ascii")
+PHOTO = base64.b64encode(b"\xff\xd8 photo" * 300).decode("ascii")
+
+
+def _request(html: str, body_type: str = "HTML") -> SendMailRequest:
+    return SendMailRequest.model_validate(
+        {
+            "subject": "Newsletter",
+            "body": {"content": html, "content_type": body_type},
+            "to": ["user@example.com"],
+        }
+    )
+
+
+def test_extracts_and_dedupes_data_uri_images():
+    html = (
+        f'<img src="data:image/png;base64,{LOGO}">'
+        f"<div style=\"background: url(data:image/jpeg;base64,{PHOTO})\"></div>"
+        f"<img src='data:image/png;base64,{LOGO}'>"
+    )
+    request = _request(html)
+
+    report = extract_inline_images(request)
+
+    assert report.references == 3
+    assert report.unique_images == 2
+    assert "data:" not in request.body.content
+    assert len(request.attachments) == 2
+    logo, photo = request.attachments
+    assert logo.is_inline and logo.content_bytes == LOGO
+    assert request.body.content.count(f"cid:{logo.content_id}") == 2
+    assert photo.name.endswith(".jpg")
+    assert report.bytes_saved > len(LOGO) - 100
+
+    graph = request.to_graph_payload(None)["message"]["attachments"][0]
+    assert graph["contentId"] == logo.content_id
+    assert graph["isInline"] is True
+
+
+def test_cache_reuses_content_ids_across_sends():
+    cache = InlineImageCache()
+    first = _request(f'<img src="data:image/png;base64,{LOGO}">')
+    second = _request(f'<img src="data:image/png;base64,{LOGO}">')
+
+    extract_inline_images(first, cache)
+    extract_inline_images(second, cache)
+
+    assert first.attachments[0].content_id == second.attachments[0].content_id
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_leaves_text_bodies_and_invalid_payloads_alone():
+    text = _request(f"data:image/png;base64,{LOGO}", body_type="Text")
+    assert extract_inline_images(text).unique_images == 0
+    assert text.attachments == []
+
+    broken = _request('<img src="data:image/png;base64,not*base64">')
+    assert extract_inline_images(broken).unique_images == 0
+    assert "data:image/png" in broken.body.content
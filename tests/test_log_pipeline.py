@@ -0,0 +1,93 @@
+import io
+import json
+import logging
+import threading
+import time
+
+from mcp_outlook.log_pipeline import LogPipeline
+
+
+class BlockedStream(io.StringIO):
+    """A stream whose writes hang until ``release`` is set, like a stuck stderr."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait(5)
+        return super().write(text)
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_json_and_redacted():
+    stream = io.StringIO()
+    pipeline = LogPipeline(stream, level=logging.INFO).install("mcp_outlook.test.redact")
+    logger = logging.getLogger("mcp_outlook.test.redact")
+
+    logger.info(
+        "Accepted message: to_count=%d",
+        2,
+        extra={"event": "send.accepted", "subject": "Salary review"},
+    )
+    logger.warning("Graph error: %s", '{"message": "Mailbox bob@example.com not found"}')
+    logger.warning(
+        "Could not delete failed draft %s",
+        "https://graph.microsoft.com/v1.0/users/bob%40example.com/messages/1",
+    )
+    pipeline.close()
+
+    accepted, error, url = _lines(stream)
+    assert accepted["event"] == "send.accepted"
+    assert accepted["message"] == "Accepted message: to_count=2"
+    assert accepted["subject"].startswith("<redacted:")
+    assert "Salary" not in stream.getvalue()
+    assert "bob@example.com" not in error["message"]
+    assert "<redacted:" in error["message"]
+    assert "bob" not in url["message"]
+    assert url["message"].startswith("Could not delete failed draft https://graph.microsoft.com/")
+    # Encoded and plain forms of one address get the same token.
+    assert url["message"].split("/users/")[1].split("/")[0] in error["message"]
+
+
+def test_sampling_is_per_event_and_spares_warnings():
+    stream = io.StringIO()
+    pipeline = LogPipeline(
+        stream, level=logging.INFO, sample_rates={"send.prepare": 0.1}
+    ).install("mcp_outlook.test.sampling")
+    logger = logging.getLogger("mcp_outlook.test.sampling")
+
+    for _ in range(100):
+        logger.info("prepare", extra={"event": "send.prepare"})
+        logger.info("accepted", extra={"event": "send.accepted"})
+    logger.warning("throttled", extra={"event": "send.prepare"})
+    pipeline.close()
+
+    events = [line["event"] for line in _lines(stream)]
+    assert events.count("send.prepare") == 11
+    assert events.count("send.accepted") == 100
+
+
+def test_full_queue_drops_instead_of_blocking():
+    stream = BlockedStream()
+    pipeline = LogPipeline(stream, level=logging.INFO, queue_size=10).install(
+        "mcp_outlook.test.drop"
+    )
+    logger = logging.getLogger("mcp_outlook.test.drop")
+
+    started = time.monotonic()
+    for index in range(200):
+        logger.info("record %d", index)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1
+    assert pipeline.stats()["dropped"] > 0
+
+    stream.release.set()
+    logger.info("after")
+    pipeline.close()
+    dropped = [line for line in _lines(stream) if line.get("event") == "log.dropped"]
+    assert dropped and dropped[0]["level"] == "WARNING"
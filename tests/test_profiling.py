@@ -0,0 +1,106 @@
+import pstats
+import threading
+import time
+
+import pytest
+
+from mcp_outlook.profiling import SendProfiler
+
+
+def _busy(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def test_disarmed_profiler_passes_calls_through(tmp_path):
+    profiler = SendProfiler(str(tmp_path))
+
+    assert profiler.run(_busy, 10) == _busy(10)
+    assert profiler.stop() is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cprofile_captures_next_n_calls(tmp_path):
+    profiler = SendProfiler(str(tmp_path))
+    profiler.start(calls=2)
+
+    profiler.run(_busy, 1000)
+    assert profiler.armed
+    profiler.run(_busy, 1000)
+    assert not profiler.armed
+
+    path = profiler.status()["last_output"]
+    assert path.endswith(".pstats")
+    stats = pstats.Stats(path)
+    assert any(func[2] == "_busy" for func in stats.stats)
+    assert profiler.status()["captured_calls"] == 2
+
+
+def test_overlapping_calls_do_not_use_up_the_capture(tmp_path):
+    profiler = SendProfiler(str(tmp_path))
+    profiler.start(calls=2)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        entered.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=profiler.run, args=(slow,))
+    thread.start()
+    entered.wait(5)
+    profiler.run(_busy, 1000)  # overlaps the profiled call, so runs unprofiled
+    assert profiler.status()["remaining_calls"] == 1
+    release.set()
+    thread.join(5)
+
+    assert profiler.armed
+    assert profiler.status()["captured_calls"] == 1
+    profiler.run(_busy, 1000)
+    assert not profiler.armed
+    assert profiler.status()["captured_calls"] == 2
+
+
+def test_sample_mode_writes_folded_stacks(tmp_path):
+    profiler = SendProfiler(str(tmp_path), sample_interval=0.0005)
+    profiler.start(calls=1, mode="sample")
+
+    profiler.run(time.sleep, 0.05)
+
+    path = profiler.status()["last_output"]
+    assert path.endswith(".folded")
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "test_sample_mode_writes_folded_stacks" in stack
+
+
+def test_start_rejects_unbounded_or_unknown_mode(tmp_path):
+    profiler = SendProfiler(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        profiler.start()
+    with pytest.raises(ValueError):
+        profiler.start(calls=1, mode="perf")
+
+
+def test_stop_waits_for_the_call_being_profiled(tmp_path):
+    profiler = SendProfiler(str(tmp_path))
+    profiler.start(calls=5)
+    entered = threading.Event()
+
+    def slow():
+        entered.set()
+        time.sleep(0.2)
+        return _busy(1000)
+
+    thread = threading.Thread(target=profiler.run, args=(slow,))
+    thread.start()
+    entered.wait(5)
+    path = profiler.stop()
+    thread.join(5)
+
+    assert path is not None
+    assert any(func[2] == "slow" for func in pstats.Stats(path).stats)
+    # Once a capture has finished, there is nothing left to stop.
+    assert profiler.stop() is None
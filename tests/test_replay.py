@@ -0,0 +1,100 @@
+import json
+
+import httpx
+import pytest
+
+from mcp_outlook.auth import GraphTokenManager
+from mcp_outlook.config import GraphSettings
+from mcp_outlook.replay import RecordingTransport, ReplayError, ReplayTransport
+
+SENDMAIL_URL = "https://graph.microsoft.com/v1.0/users/sender%40example.com/sendMail"
+
+
+def _graph_handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("/oauth2/v2.0/token"):
+        return httpx.Response(
+            200,
+            json={"access_token": "live-secret-token", "expires_in": 3600},
+        )
+    assert request.headers["Authorization"].startswith("Bearer ")
+    return httpx.Response(202)
+
+
+def _exercise(client: httpx.Client) -> int:
+    settings = GraphSettings(
+        tenant_id="tenant",
+        client_id="client",
+        client_secret="super-secret",
+    )
+    token = GraphTokenManager(settings, client=client).get_token()
+    response = client.post(
+        SENDMAIL_URL,
+        headers={"Authorization": f"Bearer {token}"},
+        json={"message": {"subject": "Hi"}},
+    )
+    return response.status_code
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    path = str(tmp_path / "graph.jsonl")
+    recorder = RecordingTransport(path, transport=httpx.MockTransport(_graph_handler))
+    with httpx.Client(transport=recorder) as client:
+        assert _exercise(client) == 202
+    return path
+
+
+def test_recording_redacts_secrets(cassette):
+    raw = open(cassette, encoding="utf-8").read()
+
+    assert "super-secret" not in raw
+    assert "live-secret-token" not in raw
+    assert "Bearer" not in raw
+
+    entries = [json.loads(line) for line in raw.splitlines()]
+    assert [entry["status"] for entry in entries] == [200, 202]
+    assert "client_secret=REDACTED" in entries[0]["request_body"]
+    assert entries[0]["json"]["access_token"] == "REDACTED"
+
+
+def test_replay_serves_recorded_exchanges_with_timing(cassette):
+    slept = []
+    replay = ReplayTransport(cassette, sleep=slept.append)
+
+    with httpx.Client(transport=replay) as client:
+        assert _exercise(client) == 202
+
+    assert len(slept) == 2
+    assert all(delay >= 0 for delay in slept)
+
+
+def test_replay_raises_when_exhausted_unless_looping(cassette):
+    with httpx.Client(transport=ReplayTransport(cassette, realtime=False)) as client:
+        client.post(SENDMAIL_URL)
+        with pytest.raises(ReplayError):
+            client.post(SENDMAIL_URL)
+
+    looping = ReplayTransport(cassette, realtime=False, loop=True)
+    with httpx.Client(transport=looping) as client:
+        assert [client.post(SENDMAIL_URL).status_code for _ in range(3)] == [202] * 3
+
+
+def test_upload_session_token_is_masked_but_replayable(tmp_path):
+    upload_url = "https://outlook.office.com/api/v2.0/AttachmentSessions('s1')?authtoken=live-upload"
+
+    def graph(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/createUploadSession"):
+            return httpx.Response(200, json={"uploadUrl": upload_url})
+        return httpx.Response(200)
+
+    def upload(client: httpx.Client) -> int:
+        session = client.post(f"{SENDMAIL_URL}/attachments/createUploadSession").json()
+        return client.put(session["uploadUrl"], content=b"chunk").status_code
+
+    path = str(tmp_path / "upload.jsonl")
+    with httpx.Client(transport=RecordingTransport(path, httpx.MockTransport(graph))) as client:
+        assert upload(client) == 200
+
+    assert "live-upload" not in open(path, encoding="utf-8").read()
+    with httpx.Client(transport=ReplayTransport(path, realtime=False)) as client:
+        assert upload(client) == 200
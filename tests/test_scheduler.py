@@ -0,0 +1,152 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from mcp_outlook.scheduler import MailScheduler, parse_send_at
+from mcp_outlook.state import StateStore
+
+
+class Recorder:
+    def __init__(self, expected: int):
+        self.calls = []
+        self.done = threading.Event()
+        self.expected = expected
+        self.lock = threading.Lock()
+
+    def __call__(self, schedule_id, payload, credentials):
+        with self.lock:
+            self.calls.append((time.monotonic(), schedule_id, payload, credentials))
+            if len(self.calls) >= self.expected:
+                self.done.set()
+        return "sent"
+
+
+def test_parse_send_at_uses_timezone_for_naive_times():
+    utc = parse_send_at("2026-03-02T09:00:00")
+    new_york = parse_send_at("2026-03-02T09:00:00", "America/New_York")
+    offset = parse_send_at("2026-03-02T09:00:00+01:00", "America/New_York")
+
+    assert new_york - utc == 5 * 3600
+    assert utc - offset == 3600
+
+    with pytest.raises(ValueError):
+        parse_send_at("next tuesday")
+    with pytest.raises(ValueError):
+        parse_send_at("2026-03-02T09:00:00", "Mars/Olympus_Mons")
+
+
+def test_due_sends_are_released_in_batches():
+    store = StateStore()
+    recorder = Recorder(expected=5)
+    scheduler = MailScheduler(store, recorder, batch_size=2, batch_interval=0.05)
+    scheduler.start()
+
+    due = time.time()
+    ids = [
+        scheduler.schedule(due, {"subject": f"s{i}"}, {"access_token": "t"} if i == 0 else None)
+        for i in range(5)
+    ]
+    assert recorder.done.wait(5)
+    scheduler.stop()
+
+    times = sorted(call[0] for call in recorder.calls)
+    assert times[-1] - times[0] >= 0.1  # three batches, two intervals apart
+    assert {call[1] for call in recorder.calls} == set(ids)
+    assert any(call[3] == {"access_token": "t"} for call in recorder.calls)
+    assert all(store.get_scheduled(i)[1] == "sent" for i in ids)
+
+
+def test_pending_sends_survive_restart_and_cancel(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    first = MailScheduler(StateStore(path), Recorder(expected=1))
+    first.start()
+    later = first.schedule(time.time() + 0.2, {"subject": "later"})
+    cancelled = first.schedule(time.time() + 0.2, {"subject": "cancelled"})
+    assert first.cancel(cancelled)
+    first.stop()
+
+    recorder = Recorder(expected=1)
+    second = MailScheduler(StateStore(path), recorder)
+    second.start()
+    assert recorder.done.wait(5)
+    time.sleep(0.05)
+    second.stop()
+
+    assert [call[1] for call in recorder.calls] == [later]
+    assert recorder.calls[0][2] == {"subject": "later"}
+
+
+def test_send_with_lost_caller_credentials_fails_after_restart(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    first = MailScheduler(StateStore(path), Recorder(expected=1))
+    first.start()
+    own = first.schedule(time.time() + 0.2, {"subject": "tenant a"}, {"access_token": "a"})
+    shared = first.schedule(time.time() + 0.2, {"subject": "server identity"})
+    first.stop()
+
+    recorder = Recorder(expected=1)
+    store = StateStore(path)
+    second = MailScheduler(store, recorder)
+    second.start()
+    assert recorder.done.wait(5)
+    time.sleep(0.05)
+    second.stop()
+
+    assert [call[1] for call in recorder.calls] == [shared]
+    due, status, result = store.get_scheduled(own)
+    assert status == "failed"
+    assert "credentials" in result
+
+
+def test_send_is_left_to_the_live_scheduler_holding_its_credentials(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    owner_recorder = Recorder(expected=1)
+    owner = MailScheduler(StateStore(path), owner_recorder)
+    own = owner.schedule(time.time() + 0.1, {"subject": "tenant a"}, {"access_token": "a"})
+
+    store = StateStore(path)
+    other = MailScheduler(store, Recorder(expected=1))
+    other.start()
+    time.sleep(0.4)
+    assert store.get_scheduled(own)[1] == "pending"
+    assert other.pending_count() == 1  # rechecked once the owner's lease could lapse
+    other.stop()
+
+    owner.start()
+    assert owner_recorder.done.wait(5)
+    owner.stop()
+    assert owner_recorder.calls[0][3] == {"access_token": "a"}
+    assert store.get_scheduled(own)[1] == "sent"
+
+
+class FlakyStore(StateStore):
+    """Store whose first ``finish_scheduled`` call fails, as when SQLite stays busy."""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def finish_scheduled(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return super().finish_scheduled(*args, **kwargs)
+
+
+def test_store_errors_do_not_stop_the_scheduler():
+    store = FlakyStore()
+    recorder = Recorder(expected=2)
+    scheduler = MailScheduler(store, recorder, batch_interval=0.01)
+    scheduler.start()
+
+    first = scheduler.schedule(time.time(), {"subject": "first"})
+    time.sleep(0.2)
+    second = scheduler.schedule(time.time(), {"subject": "second"})
+    assert recorder.done.wait(5)
+    time.sleep(0.05)
+    scheduler.stop()
+
+    assert store.get_scheduled(first)[1] == "sending"
+    assert store.get_scheduled(second)[1] == "sent"
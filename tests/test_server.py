@@ -0,0 +1,134 @@
+import json
+import logging
+import time
+
+import httpx
+import pytest
+from starlette.testclient import TestClient
+
+import server
+from mcp_outlook.concurrency import ConcurrencyController
+from mcp_outlook.config import GraphSettings
+from mcp_outlook.inline_images import InlineImageReport
+from mcp_outlook.log_pipeline import DroppingBufferHandler
+from mcp_outlook.state import StateStore
+
+
+class FakeGraph:
+    def __init__(self):
+        self.sends = []
+        self.status = 202
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith("/sendMail")
+        self.sends.append(request)
+        return httpx.Response(self.status)
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    fake = FakeGraph()
+    client = httpx.Client(transport=httpx.MockTransport(fake))
+    store = StateStore()
+    controller = ConcurrencyController()
+    monkeypatch.setattr(server, "get_http_client", lambda: client)
+    monkeypatch.setattr(server, "get_state_store", lambda: store)
+    monkeypatch.setattr(server, "get_concurrency_controller", lambda: controller)
+    monkeypatch.setattr(
+        server, "get_graph_settings", lambda: GraphSettings(None, None, None)
+    )
+    fake.controller = controller
+    yield fake
+    client.close()
+    store.close()
+
+
+def _send(access_token, subject, to, key="k1"):
+    return server.send_outlook_mail_impl(
+        subject=subject,
+        body="Hello",
+        to=[to],
+        access_token=access_token,
+        idempotency_key=key,
+    )
+
+
+def test_idempotency_keys_are_scoped_per_caller(graph):
+    first = _send("token-a", "From A", "a@example.com")
+    repeat = _send("token-a", "From A", "a@example.com")
+    other = _send("token-b", "From B", "b@example.com")
+
+    assert repeat == first
+    assert other.startswith("Microsoft Graph accepted the message")
+    assert len(graph.sends) == 2
+    assert graph.sends[1].headers["Authorization"] == "Bearer token-b"
+
+
+def test_only_graph_successes_and_throttling_adjust_send_limits(graph):
+    graph.status = 400
+    with pytest.raises(RuntimeError, match="400"):
+        _send("token-a", "Rejected", "a@example.com", key=None)
+    assert all(stats["completed"] == 0 for stats in graph.controller.snapshot().values())
+
+    graph.status = 202
+    _send("token-a", "Accepted", "a@example.com", key=None)
+    snapshot = graph.controller.snapshot()
+    assert all(stats["last_decision"] == "increase" for stats in snapshot.values())
+    assert all(stats["in_flight"] == 0 for stats in snapshot.values())
+
+
+def test_delegated_callers_get_their_own_send_limits(graph):
+    _send("token-a", "From A", "a@example.com", key=None)
+    _send("token-b", "From B", "b@example.com", key=None)
+
+    keys = set(graph.controller.snapshot())
+    assert len(keys) == 4
+    assert not keys & {"tenant:delegated:me", "mailbox:me"}
+
+
+def test_scheduling_requires_a_persistent_store(graph):
+    with pytest.raises(RuntimeError, match="persistent state store"):
+        server.schedule_outlook_mail(
+            send_at="2030-01-01T09:00:00",
+            subject="Later",
+            body="Hello",
+            to=["a@example.com"],
+        )
+
+
+def test_server_lifespan_releases_pending_scheduled_sends(graph, monkeypatch):
+    monkeypatch.setattr(
+        server,
+        "get_graph_settings",
+        lambda: GraphSettings(None, None, None, delegated_token="env-token"),
+    )
+    store = server.get_state_store()
+    payload = {"subject": "Reloaded", "body": "Hello", "to": ["a@example.com"]}
+    store.add_scheduled("reloaded", time.time() - 1, json.dumps(payload))
+
+    app = server.mcp.http_app(transport="streamable-http", stateless_http=True)
+    with TestClient(app):
+        for _ in range(100):
+            if store.get_scheduled("reloaded")[1] == "sent":
+                break
+            time.sleep(0.05)
+
+    assert store.get_scheduled("reloaded")[1] == "sent"
+    assert len(graph.sends) == 1
+
+
+def test_server_lifespan_installs_log_pipeline(graph):
+    app = server.mcp.http_app(transport="streamable-http", stateless_http=True)
+    logger = logging.getLogger("mcp_outlook")
+    with TestClient(app):
+        assert any(isinstance(handler, DroppingBufferHandler) for handler in logger.handlers)
+    assert not logger.handlers
+
+
+def test_inline_image_note_reports_growth_as_growth():
+    saved = server._describe_inline_images(InlineImageReport(3, 1, 2048))
+    grown = server._describe_inline_images(InlineImageReport(1, 1, -40))
+
+    assert saved.endswith("saving 2048 bytes.")
+    assert grown.endswith("adding 40 bytes of attachment overhead.")
+    assert "-" not in grown
@@ -0,0 +1,125 @@
+import os
+import stat
+
+import httpx
+
+from mcp_outlook.auth import GraphTokenManager
+from mcp_outlook.config import GraphSettings, ServerSettings
+from mcp_outlook.state import StateStore
+
+
+def test_token_bucket_limits_and_refills():
+    now = {"t": 1000.0}
+    store = StateStore(clock=lambda: now["t"])
+
+    assert store.consume("mailbox:a", rate=1.0, capacity=2.0) == 0.0
+    assert store.consume("mailbox:a", rate=1.0, capacity=2.0) == 0.0
+    assert store.consume("mailbox:a", rate=1.0, capacity=2.0) > 0.0
+
+    now["t"] += 1.0
+    assert store.consume("mailbox:a", rate=1.0, capacity=2.0) == 0.0
+
+
+def test_idempotency_claim_complete_and_release():
+    store = StateStore()
+
+    assert store.claim_idempotency("k", pending_ttl=60) is None
+    assert store.claim_idempotency("k", pending_ttl=60) == ("pending", None)
+
+    store.complete_idempotency("k", "sent", ttl=60)
+    assert store.claim_idempotency("k", pending_ttl=60) == ("done", "sent")
+
+    assert store.claim_idempotency("other", pending_ttl=60) is None
+    store.release_idempotency("other")
+    assert store.claim_idempotency("other", pending_ttl=60) is None
+
+
+def test_abandoned_pending_claim_expires_before_result_ttl():
+    now = {"t": 1000.0}
+    store = StateStore(clock=lambda: now["t"])
+
+    assert store.claim_idempotency("crashed", pending_ttl=40) is None
+    now["t"] += 41
+    assert store.claim_idempotency("crashed", pending_ttl=40) is None
+
+    store.complete_idempotency("crashed", "sent", ttl=86400)
+    now["t"] += 3600
+    assert store.claim_idempotency("crashed", pending_ttl=40) == ("done", "sent")
+
+
+def test_lease_is_exclusive_between_stores(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    first = StateStore(path)
+    second = StateStore(path)
+
+    assert first.try_acquire_lease("refresh", ttl=30)
+    assert not second.try_acquire_lease("refresh", ttl=30)
+
+    first.release_lease("refresh")
+    assert second.try_acquire_lease("refresh", ttl=30)
+
+
+def test_token_shared_between_workers(tmp_path):
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        return httpx.Response(
+            200,
+            json={"access_token": "shared-token", "expires_in": 3600},
+        )
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    settings = GraphSettings(
+        tenant_id="tenant",
+        client_id="client",
+        client_secret="secret",
+    )
+    path = str(tmp_path / "state.sqlite3")
+
+    # Two stores on one file stand in for two worker processes.
+    first = GraphTokenManager(settings, client=client, store=StateStore(path))
+    second = GraphTokenManager(settings, client=client, store=StateStore(path))
+
+    assert first.get_token() == "shared-token"
+    assert second.get_token() == "shared-token"
+    assert calls["count"] == 1
+
+    other_secret = GraphTokenManager(
+        settings, client_secret="different", client=client, store=StateStore(path)
+    )
+    assert other_secret.get_token() == "shared-token"
+    assert calls["count"] == 2
+
+    client.close()
+
+
+def test_store_refuses_symlinked_path(tmp_path):
+    target = tmp_path / "elsewhere.sqlite3"
+    target.write_bytes(b"")
+    link = tmp_path / "state.sqlite3"
+    link.symlink_to(target)
+
+    try:
+        StateStore(str(link))
+    except OSError:
+        pass
+    else:
+        raise AssertionError("Expected OSError for a symlinked state path")
+
+
+def test_store_tightens_permissions_of_existing_file(tmp_path):
+    path = tmp_path / "state.sqlite3"
+    path.write_bytes(b"")
+    path.chmod(0o644)
+
+    StateStore(str(path)).close()
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_default_state_path_is_on_disk(monkeypatch, tmp_path):
+    monkeypatch.delenv("MCP_OUTLOOK_STATE_PATH", raising=False)
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+
+    assert ServerSettings.load().state_path == str(tmp_path / "mcp-outlook" / "state.sqlite3")